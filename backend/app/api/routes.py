@@ -13,21 +13,50 @@ import logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-from app.services.file_parser import get_schema, to_builtin
-from app.services.sql_generator import generate_sql
-from app.services.orm_generator import generate_orm
+from app.services.file_parser import get_schema, read_frame, to_builtin
+from app.services.upload_spool import spooled_upload, UploadTooLarge
 from app.services.link_suggester import (
     suggest_links_by_name,
+    suggest_links_for_columns,
     boost_links_by_type,
     validate_links_by_overlap,
 )
+from app.services.table_diff import diff_columns, merge_columns, split_links
+from app.services.artifact_cache import cached_artifacts, invalidate
+from app.services.schema_graph import get_graph, reset_graph
 from app.services.schema_infer import (
     ensure_primary_key,
     validate_schema,
 )
+from app.services.frame_compactor import compact_frame, frame_bytes
+from app.core.config import (
+    MAX_SESSION_BYTES,
+    MAX_UPLOAD_BYTES,
+)
+from app.core.metrics import (
+    span,
+    LIVE_SESSIONS,
+    SESSION_DF_BYTES,
+    UPLOAD_BYTES,
+    UPLOAD_ROWS,
+    UPLOAD_COLUMNS,
+    UPLOADS_TOTAL,
+    SUGGESTIONS_TOTAL,
+)
 #Literals
 SESSIONS = {}
 
+def _session_df_bytes() -> int:
+    # sizes recorded at upload time; measuring the frames on every scrape is too slow
+    return sum(
+        m["bytes_after"]
+        for session in list(SESSIONS.values())
+        for m in list(session.get("memory", {}).values())
+    )
+
+LIVE_SESSIONS.set_function(lambda: len(SESSIONS))
+SESSION_DF_BYTES.set_function(_session_df_bytes)
+
 #Model Request Bodies
 class LinkModel(BaseModel):
     session_id:str
@@ -41,6 +70,62 @@ class TableNameModel(BaseModel):
     table_name: str
     new_name: str
     
+def _replace_table(session: dict, old_table: dict, schema_info: dict, df, memory: dict, profiles: dict, deep_check: bool) -> dict:
+    """Swap a stored table for a re-uploaded version, recomputing only what touches changed columns.
+
+    Everything is computed against a staged copy of the session first; the session is
+    only modified once suggestion and overlap validation have succeeded.
+    """
+    table_name = old_table["name"]
+    diff = diff_columns(session["profiles"].get(table_name, {}), profiles)
+    dirty = diff["added"] + diff["changed"]
+
+    # unchanged columns that moved in or out of the primary key still need new suggestions
+    was_pk = {c["name"] for c in old_table["columns"] if c.get("is_primary_key")}
+    dirty += [c["name"] for c in schema_info["columns"]
+              if c["name"] in diff["unchanged"] and bool(c.get("is_primary_key")) != (c["name"] in was_pk)]
+
+    # keep stored entries for unchanged columns, take fresh inference for the rest
+    new_table = {**schema_info, "columns": merge_columns(old_table["columns"], schema_info["columns"], diff["unchanged"])}
+    tables = [new_table if t is old_table else t for t in session["tables"]]
+    dfs = {**session["dfs"], table_name: df}
+
+    # confirmed links are dropped when a column is removed or a referenced key loses its PK status
+    is_pk = {c["name"] for c in new_table["columns"] if c.get("is_primary_key")}
+    lost_keys = {f"{table_name}.{c}" for c in was_pk - is_pk}
+    dropped_links, kept_links = split_links(session["links"], table_name, diff["removed"])
+    dropped_links += [l for l in kept_links if l["to"] in lost_keys]
+    kept_links = [l for l in kept_links if l["to"] not in lost_keys]
+
+    suggestions = suggest_links_for_columns(new_table, dirty, tables)
+    suggestions = boost_links_by_type(suggestions, tables)
+    if deep_check:
+        validated = []
+        for from_table in dict.fromkeys(s["from"].split(".")[0] for s in suggestions):
+            schema = next(t for t in tables if t["name"] == from_table)
+            from_suggestions = [s for s in suggestions if s["from"].split(".")[0] == from_table]
+            validated += validate_links_by_overlap(schema, dfs, from_suggestions)
+        suggestions = validated
+
+    confirmed = {(l["from"], l["to"]) for l in kept_links}
+    suggestions = [s for s in suggestions if (s["from"], s["to"]) not in confirmed]
+
+    # commit: from here on nothing can fail
+    graph = get_graph(session)
+    for link in dropped_links:
+        graph.remove_link(link)
+    session["links"] = kept_links
+    _, session["suggested_links"] = split_links(session["suggested_links"], table_name, dirty + diff["removed"])
+    session["suggested_links"].extend(suggestions)
+    old_table.clear()
+    old_table.update(new_table)
+    session["dfs"][table_name] = df
+    session["memory"][table_name] = memory
+    session["profiles"][table_name] = profiles
+
+    invalidate(session, [table_name] + [l["from"].split(".")[0] for l in dropped_links])
+    return {"diff": diff, "invalidated_links": dropped_links, "suggested_links": suggestions}
+
 #Endpoints
 router = APIRouter()
 
@@ -51,28 +136,59 @@ async def upload_file(
     has_headers: bool = Query(True),
     with_row_count: bool = Query(False),
     with_preview: bool = Query(False),
-    deep_check: bool = Query(False, description="Enable statistical validation for link suggestions?")
+    deep_check: bool = Query(False, description="Enable statistical validation for link suggestions?"),
+    compact: bool = Query(True, description="Downcast the stored DataFrame and keep only link columns?"),
+    replace: bool = Query(False, description="Replace a table of the same name, updating only links on changed columns?")
 ):
     """
     Upload a file (CSV/Excel/JSON), infer schema, normalize, and
     add to a session. Returns schema + suggested links.
     """
     try:
-        file_bytes = await file.read()
+        # parse straight from the file Starlette spooled the body into (before this handler ran); no copy is made
+        source, upload_size = spooled_upload(file, MAX_UPLOAD_BYTES)
+        UPLOAD_BYTES.observe(upload_size)
+
         schema_info = get_schema(
-            file_bytes,
+            source,
             file.filename,
             has_headers=has_headers,
             with_row_count=with_row_count,
-            with_preview=with_preview
+            with_preview=with_preview,
+            with_profiles=True
         )
+        profiles = schema_info.pop("profiles")
         
-        schema,pk_warnings = ensure_primary_key(schema_info["columns"])
-        warn = validate_schema(schema)
+        with span("validate_schema"):
+            schema,pk_warnings = ensure_primary_key(schema_info["columns"])
+            warn = validate_schema(schema)
         schema_info["columns"] = schema
         schema_info["validation_warnings"] = pk_warnings + warn
 
         logger.info(f"File {file.filename} processed. Session ID: {session_id}")
+        table_name = file.filename.split(".")[0]
+        schema_info["name"] = table_name
+
+        with span("parse_dataframe"):
+            df = read_frame(source, file.filename, has_headers=has_headers)
+        UPLOAD_ROWS.observe(len(df))
+        if compact:
+            df, memory = compact_frame(df, schema, links_only=True)
+        else:
+            size = frame_bytes(df)
+            memory = {"bytes_before": size, "bytes_after": size, "dropped_columns": []}
+        schema_info["memory"] = memory
+        UPLOAD_COLUMNS.observe(len(schema_info["columns"]))
+
+        # check the memory cap before a new session is created, so a rejected upload leaves nothing behind
+        held_memory = SESSIONS[session_id].get("memory", {}) if session_id else {}
+        held = sum(m["bytes_after"] for name, m in held_memory.items() if name != table_name)
+        if MAX_SESSION_BYTES and held + memory["bytes_after"] > MAX_SESSION_BYTES:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Session {session_id or '(new)'} would hold {held + memory['bytes_after']} bytes of data (limit {MAX_SESSION_BYTES})"
+            )
+
         # Create new session if not provided
         if not session_id:
             session_id = str(uuid.uuid4())
@@ -81,37 +197,49 @@ async def upload_file(
                 "links": [],
                 "suggested_links": [],
                 "dfs": {},
+                "memory": {},
+                "profiles": {},
                 "schema_name": None
             }
-        
+
         logger.info(f"Using session ID: {session_id}")
-        
+        session_memory = SESSIONS[session_id].setdefault("memory", {})
+        session = SESSIONS[session_id]
+        session.setdefault("profiles", {})
+        old_table = next((t for t in session["tables"] if t["name"] == table_name), None) if replace else None
+
+        if old_table is not None:
+            result = _replace_table(session, old_table, schema_info, df, memory, profiles, deep_check)
+            SUGGESTIONS_TOTAL.inc(len(result["suggested_links"]))
+            logger.info(f"Session {session_id}: Table {table_name} replaced. Changed columns: {result['diff']['added'] + result['diff']['changed'] + result['diff']['removed']}")
+
+            with span("serialize"):
+                response = JSONResponse(
+                    content=to_builtin({
+                        "session_id": session_id,
+                        "table_replaced": table_name,
+                        "schema": old_table,
+                        **result
+                    }),
+                    status_code=status.HTTP_200_OK
+                )
+            UPLOADS_TOTAL.inc(labels={"outcome": "success"})
+            return response
+
         # store schema + dataframe
-        table_name = file.filename.split(".")[0]
-        schema_info["name"] = table_name
+        get_graph(session).add_table(table_name)
         SESSIONS[session_id]["tables"].append(schema_info)
-        
-
-        import pandas as pd
-        if file.filename.endswith(".csv"):
-            df = pd.read_csv(BytesIO(file_bytes), header=0 if has_headers else None)
-        elif file.filename.endswith((".xls", ".xlsx")):
-            df = pd.read_excel(BytesIO(file_bytes), header=0 if has_headers else None)
-        elif file.filename.endswith(".json"):
-            df = pd.read_json(BytesIO(file_bytes))
-        else:
-            df = None
-        if df is not None and not has_headers:
-            df.columns = [f"col_{i+1}" for i in range(len(df.columns))]
-        if df is not None:
-            SESSIONS[session_id]["dfs"][table_name] = df
+        SESSIONS[session_id]["dfs"][table_name] = df
+        session_memory[table_name] = memory
+        session["profiles"][table_name] = profiles
+        invalidate(session, [table_name])
 
         # run suggestion pipeline
         existing_tables = [t for t in SESSIONS[session_id]["tables"] if t["name"] != table_name]
         suggestions = suggest_links_by_name(schema_info, existing_tables)
         suggestions = boost_links_by_type(suggestions, SESSIONS[session_id]["tables"])
 
-        if deep_check and df is not None:
+        if deep_check:
             suggestions = validate_links_by_overlap(
                 schema_info, 
                 SESSIONS[session_id]["dfs"], 
@@ -119,19 +247,30 @@ async def upload_file(
             )
 
         SESSIONS[session_id]["suggested_links"].extend(suggestions)
+        SUGGESTIONS_TOTAL.inc(len(suggestions))
         logger.info(f"Session {session_id}: Table {table_name} added with {len(schema_info['columns'])} columns. {len(suggestions)} link suggestions generated.")
         
-        return JSONResponse(
-            content=to_builtin({
-                "session_id": session_id,
-                "table_added": table_name,
-                "schema": schema_info,
-                "suggested_links": suggestions
-            }),
-            status_code=status.HTTP_201_CREATED if len(SESSIONS[session_id]["tables"]) == 1 else status.HTTP_200_OK
-        )
-    
+        with span("serialize"):
+            response = JSONResponse(
+                content=to_builtin({
+                    "session_id": session_id,
+                    "table_added": table_name,
+                    "schema": schema_info,
+                    "suggested_links": suggestions
+                }),
+                status_code=status.HTTP_201_CREATED if len(SESSIONS[session_id]["tables"]) == 1 else status.HTTP_200_OK
+            )
+        UPLOADS_TOTAL.inc(labels={"outcome": "success"})
+        return response
+
+    except UploadTooLarge as e:
+        UPLOADS_TOTAL.inc(labels={"outcome": "rejected"})
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+    except HTTPException:
+        UPLOADS_TOTAL.inc(labels={"outcome": "rejected"})
+        raise
     except Exception as e:
+        UPLOADS_TOTAL.inc(labels={"outcome": "error"})
         logger.error(f"Error processing file {file.filename}: {str(e)}")
         logger.error(traceback.format_exc())
         raise HTTPException(status_code=400, detail=str(e))
@@ -154,8 +293,10 @@ def accept_link(link: LinkModel):
         raise HTTPException(status_code=404, detail="Suggested link not found")
 
     # move it into confirmed links
+    get_graph(session).add_link(match)
     session["links"].append(match)
     session["suggested_links"].remove(match)
+    invalidate(session, [match["from"].split(".")[0]])
 
     return JSONResponse(
         content=to_builtin({
@@ -225,6 +366,12 @@ def rename_table(session_id: str, body: TableNameModel):
 
     old_name = table["name"]
     table["name"] = body.new_name.strip()
+    # per-table state is keyed by name; move it so caps and replace diffs keep working
+    for key in ("dfs", "memory", "profiles"):
+        if old_name in session.get(key, {}):
+            session[key][table["name"]] = session[key].pop(old_name)
+    invalidate(session)
+    reset_graph(session)
 
     return JSONResponse(
         content=to_builtin({
@@ -254,12 +401,46 @@ def get_session(session_id: str):
         raise HTTPException(status_code=404, detail="Session not found")
     return JSONResponse(content=session, status_code=status.HTTP_200_OK)
     
+@router.get("/session/{session_id}/graph")
+def get_session_graph(
+    session_id: str,
+    from_table: str = Query(None, description="Start table for a join path"),
+    to_table: str = Query(None, description="End table for a join path")
+):
+    """Analyse the table/link graph of a session.
+
+    Args:
+        session_id (str): The ID of the session to analyse.
+        from_table (str, optional): With `to_table`, also return the shortest join path between them.
+        to_table (str, optional): See `from_table`.
+
+    Raises:
+        HTTPException: If the session is not found.
+
+    Returns:
+        _type_: Adjacency list, creation order, deferred links, components, cycles and optional join path.
+    """
+    session = SESSIONS.get(session_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
+
+    graph = get_graph(session)
+    content = {"session_id": session_id, **graph.to_dict()}
+    if from_table and to_table:
+        path = graph.join_path(from_table, to_table)
+        content["join_path"] = None if path is None else [{"from": l["from"], "to": l["to"]} for l in path]
+
+    return JSONResponse(content=to_builtin(content), status_code=status.HTTP_200_OK)
+
 @router.post("/link")
 def add_link(link: LinkModel):
     session = SESSIONS.get(link.session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
-    session["links"].append({"from": link.from_field,"to": link.to_field})
+    new_link = {"from": link.from_field,"to": link.to_field}
+    get_graph(session).add_link(new_link)
+    session["links"].append(new_link)
+    invalidate(session, [link.from_field.split(".")[0]])
     return JSONResponse(
         content=to_builtin({
             "session_id": link.session_id, "links": session["links"]
@@ -279,10 +460,7 @@ def generate_artifacts(
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
 
-    if format == "sql":
-        result = generate_sql(session)
-    else:
-        result = generate_orm(session)
+    result = cached_artifacts(session, format)
 
     if as_json:
         # Return as {"sql": [...]} or {"orm": [...]}
@@ -306,11 +484,10 @@ async def download_output(session_id: str, format: str = Query("sql", enum=["sql
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
     
+    result = cached_artifacts(session, format)
     if format == "sql":
-        result = generate_sql(session)
         filename = f"{session.get('schema_name')}.sql"
     else:
-        result = generate_orm(session)
         filename = f"{session.get('schema_name')}.py"
     
     file_content = "\n".join(result)
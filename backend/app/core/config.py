@@ -1,5 +1,16 @@
+import os
+
 VERSION = "0.2.0"
 TITLE = "Sheet2Schema API"
 REPO = "https://github.com/Bettys-sidepiece/Sheet2Schema"
 LICENSE = "GNU General Public License v3.0"
 WEBSITE = "https://sheet2schema.com"
+
+# Attach a Server-Timing header with per-stage durations to every response
+SERVER_TIMING = os.getenv("S2S_SERVER_TIMING", "false").lower() in ("1", "true", "yes")
+
+# Upper bound on DataFrame bytes kept per session (0 disables the cap)
+MAX_SESSION_BYTES = int(os.getenv("S2S_MAX_SESSION_BYTES", str(512 * 1024 * 1024)))
+
+# Uploads larger than this are rejected with 413 (0 disables the limit)
+MAX_UPLOAD_BYTES = int(os.getenv("S2S_MAX_UPLOAD_BYTES", str(200 * 1024 * 1024)))
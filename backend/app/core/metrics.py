@@ -0,0 +1,183 @@
+#core/metrics.py
+
+import time
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Default buckets (seconds) for stage latency
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Default buckets for upload sizes (bytes)
+BYTES_BUCKETS = (1_024, 10_240, 102_400, 1_048_576, 10_485_760, 104_857_600, 1_073_741_824)
+# Default buckets for row / column counts
+COUNT_BUCKETS = (10, 100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+# Spans recorded during the current request (used for the Server-Timing header)
+_request_spans: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("request_spans", default=None)
+
+
+def _label_key(labels: Optional[Dict[str, str]]) -> Tuple[Tuple[str, str], ...]:
+    return tuple(sorted((labels or {}).items()))
+
+
+def _format_labels(key: Tuple[Tuple[str, str], ...], extra: Optional[Dict[str, str]] = None) -> str:
+    pairs = list(key) + list((extra or {}).items())
+    if not pairs:
+        return ""
+    escaped = []
+    for k, v in pairs:
+        v = str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        escaped.append(f'{k}="{v}"')
+    return "{" + ",".join(escaped) + "}"
+
+
+class Counter:
+    """Monotonically increasing counter, optionally labelled."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, doc: str):
+        self.name = name
+        self.doc = doc
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, labels: Optional[Dict[str, str]] = None):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            return [f"{self.name}{_format_labels(k)} {v}" for k, v in self._values.items()]
+
+
+class Gauge:
+    """Value that can go up and down. A callback may be supplied to compute it at scrape time."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, doc: str):
+        self.name = name
+        self.doc = doc
+        self._value = 0.0
+        self._fn: Optional[Callable[[], float]] = None
+
+    def set(self, value: float):
+        self._value = value
+
+    def set_function(self, fn: Callable[[], float]):
+        self._fn = fn
+
+    def render(self) -> List[str]:
+        value = self._fn() if self._fn is not None else self._value
+        return [f"{self.name} {value}"]
+
+
+class Histogram:
+    """Cumulative histogram with fixed buckets, optionally labelled."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, doc: str, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.doc = doc
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple, Dict] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, labels: Optional[Dict[str, str]] = None):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+                self._series[key] = series
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["counts"][i] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def render(self) -> List[str]:
+        lines = []
+        with self._lock:
+            for key, series in self._series.items():
+                for bound, count in zip(self.buckets, series["counts"]):
+                    lines.append(f"{self.name}_bucket{_format_labels(key, {'le': str(bound)})} {count}")
+                lines.append(f"{self.name}_bucket{_format_labels(key, {'le': '+Inf'})} {series['count']}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {series['sum']}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {series['count']}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+
+    def register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        out = []
+        for metric in self._metrics.values():
+            out.append(f"# HELP {metric.name} {metric.doc}")
+            out.append(f"# TYPE {metric.name} {metric.kind}")
+            out.extend(metric.render())
+        return "\n".join(out) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.register(Histogram("s2s_stage_duration_seconds", "Time spent in each processing stage"))
+REQUEST_SECONDS = REGISTRY.register(Histogram("s2s_request_duration_seconds", "HTTP request latency"))
+UPLOAD_BYTES = REGISTRY.register(Histogram("s2s_upload_bytes", "Size of uploaded files in bytes", BYTES_BUCKETS))
+UPLOAD_ROWS = REGISTRY.register(Histogram("s2s_upload_rows", "Rows per uploaded table", COUNT_BUCKETS))
+UPLOAD_COLUMNS = REGISTRY.register(Histogram("s2s_upload_columns", "Columns per uploaded table", COUNT_BUCKETS))
+UPLOADS_TOTAL = REGISTRY.register(Counter("s2s_uploads_total", "Uploads processed, by outcome"))
+SUGGESTIONS_TOTAL = REGISTRY.register(Counter("s2s_link_suggestions_total", "Link suggestions generated"))
+REQUESTS_TOTAL = REGISTRY.register(Counter("s2s_requests_total", "HTTP requests, by method and status"))
+LIVE_SESSIONS = REGISTRY.register(Gauge("s2s_live_sessions", "Number of sessions held in memory"))
+SESSION_DF_BYTES = REGISTRY.register(Gauge("s2s_session_dataframe_bytes", "Bytes held by DataFrames stored in sessions"))
+
+
+@contextmanager
+def span(stage: str):
+    """Time a block, record it in the stage histogram and in the current request's spans."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.observe(elapsed, {"stage": stage})
+        spans = _request_spans.get()
+        if spans is not None:
+            spans.append((stage, elapsed))
+
+
+def timed(stage: str):
+    """Decorator form of `span` for service functions."""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def start_request_spans() -> List[Tuple[str, float]]:
+    spans: List[Tuple[str, float]] = []
+    _request_spans.set(spans)
+    return spans
+
+
+def server_timing_header(spans: List[Tuple[str, float]], total: float) -> str:
+    """Build a Server-Timing header value (durations in milliseconds)."""
+    entries = [f"{name};dur={elapsed * 1000:.2f}" for name, elapsed in spans]
+    entries.append(f"total;dur={total * 1000:.2f}")
+    return ", ".join(entries)
@@ -1,4 +1,6 @@
 from fastapi import APIRouter # type: ignore
+from fastapi.responses import PlainTextResponse # type: ignore
+from app.core.metrics import REGISTRY
 
 router = APIRouter()
 
@@ -16,3 +18,8 @@ def get_credits():
         "Website": "https://sheet2schema.com",
         "Year": "2025"
     }
+
+@router.get("/metrics")
+def get_metrics():
+    """Expose stage timings, upload sizes and session gauges in Prometheus text format."""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
@@ -1,24 +1,79 @@
-from fastapi import FastAPI # type: ignore
+import time
+from fastapi import FastAPI, Request # type: ignore
 from  fastapi.middleware.cors import CORSMiddleware # type: ignore
 from app.api import routes as api_routes
 from app.core import routes as core_routes
-from app.core.config import (TITLE, VERSION,)
+from app.core.config import (TITLE, VERSION, SERVER_TIMING, MAX_UPLOAD_BYTES,)
+from app.services.upload_spool import UploadSizeLimit
+from app.core.metrics import (
+    REQUEST_SECONDS,
+    REQUESTS_TOTAL,
+    UPLOADS_TOTAL,
+    start_request_spans,
+    server_timing_header,
+)
 
 app = FastAPI(title=TITLE, version=VERSION)
 
+UPLOAD_PATH = "/api/upload"
+
 origins = [
     "http://localhost:3000",
     "http://127.0.0.1:3000",
 ]
 
+# Middleware added later wraps earlier ones: metrics -> CORS -> upload limit -> routes.
+# Oversized bodies are cut off while streaming, before multipart parsing spools them.
+app.add_middleware(
+    UploadSizeLimit,
+    max_bytes=MAX_UPLOAD_BYTES and MAX_UPLOAD_BYTES + 64 * 1024,  # allow for multipart framing
+    paths=[UPLOAD_PATH],
+    on_reject=lambda: UPLOADS_TOTAL.inc(labels={"outcome": "rejected"}),
+)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
 
+def route_label(scope: dict) -> str:
+    """Route template of a request (e.g. /api/session/{session_id}), keeping label cardinality bounded.
+
+    Included routers keep their own, prefix-less paths, so the prefix is taken from
+    the leading segments of the request path that the template does not cover.
+    """
+    route = scope.get("route")
+    if route is None:
+        # uploads rejected by the size limit never reach the router
+        return UPLOAD_PATH if scope["path"] == UPLOAD_PATH else "unmatched"
+    template = route.path_format
+    depth = template.rstrip("/").count("/")
+    segments = scope["path"].rstrip("/").split("/")
+    return "/".join(segments[:len(segments) - depth]) + template
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    spans = start_request_spans()
+    start = time.perf_counter()
+    response = await call_next(request)
+    elapsed = time.perf_counter() - start
+
+    path = route_label(request.scope)
+    REQUEST_SECONDS.observe(elapsed, {"method": request.method, "path": path})
+    REQUESTS_TOTAL.inc(labels={"method": request.method, "path": path, "status": str(response.status_code)})
+
+    if SERVER_TIMING:
+        response.headers["Server-Timing"] = server_timing_header(spans, elapsed)
+        # browsers only expose Server-Timing to the frontend's timing APIs for allowed origins
+        origin = request.headers.get("origin")
+        if origin in origins:
+            response.headers["Timing-Allow-Origin"] = origin
+    return response
+
 # Include routers
 app.include_router(api_routes.router, prefix="/api", tags=["api"])
 app.include_router(core_routes.router, prefix="/core", tags=["core"])
@@ -0,0 +1,52 @@
+from typing import Iterable, Optional
+from app.services.sql_generator import generate_sql
+from app.services.orm_generator import generate_orm
+
+# Per-table blocks of generated output, keyed by format then "<position>:<table name>"
+GENERATORS = {
+    "sql": generate_sql,
+    "orm": generate_orm,
+}
+
+def _cache(session: dict) -> dict:
+    return session.setdefault("artifacts", {fmt: {} for fmt in GENERATORS})
+
+def invalidate(session: dict, tables: Optional[Iterable[str]] = None):
+    """Drop cached blocks for the given table names, or for every table when `tables` is None."""
+    cache = _cache(session)
+    if tables is None:
+        for blocks in cache.values():
+            blocks.clear()
+        return
+
+    names = set(tables)
+    for blocks in cache.values():
+        for key in [k for k in blocks if k.split(":", 1)[1] in names]:
+            del blocks[key]
+
+def cached_artifacts(session: dict, fmt: str) -> list[str]:
+    """Generated SQL/ORM for a session, rebuilding only the tables that were invalidated.
+
+    The generators assemble the output as usual; only the per-table blocks come from
+    the cache. A block is also rebuilt when the links it declares change, e.g. when a
+    new link closes a cycle and one of the table's foreign keys has to be deferred.
+
+    Args:
+        session (dict): the session holding tables and links
+        fmt (str): "sql" or "orm"
+
+    Returns:
+        list[str]: same lines as generate_sql / generate_orm
+    """
+    blocks = _cache(session).setdefault(fmt, {})
+    position = {id(t): i for i, t in enumerate(session["tables"])}
+
+    def block(table: dict, links: list, build) -> list[str]:
+        key = f"{position[id(table)]}:{table['name']}"
+        signature = tuple((l["from"], l["to"]) for l in links)
+        cached = blocks.get(key)
+        if cached is None or cached[0] != signature:
+            cached = blocks[key] = (signature, build(table, links))
+        return cached[1]
+
+    return GENERATORS[fmt](session, block=block)
@@ -1,8 +1,12 @@
+import os
 import pandas as pd
 import numpy as np
-from typing import Dict, Any
+from typing import Dict, Any, Union, BinaryIO
 from io import BytesIO
 from app.services.schema_infer import normalize_columns, validate_schema
+from app.services.table_diff import profile_columns
+from app.services.upload_spool import spooled_file
+from app.core.metrics import timed
 
 SQL_RESERVED = {
     "select", "from", "where", "insert", "update", "delete",
@@ -22,42 +26,71 @@ def to_builtin(obj: Any) -> Any: # Convert numpy types to native Python types fo
         return [to_builtin(v) for v in obj]
     return obj
 
-def get_schema(file_bytes: bytes,
+def read_frame(source: Union[bytes, str, os.PathLike, BinaryIO],
                filename: str,
-               has_headers:bool=True,
-               with_row_count:bool = True,
-               with_preview:bool = False
-            ) -> Dict[str, Any]:
-    """Extract schema from uploaded file.
+               has_headers: bool = True
+            ) -> pd.DataFrame:
+    """Parse an uploaded file into a DataFrame.
 
     Args:
-        file_bytes (bytes): The content of the uploaded file.
-        filename (str): The name of the uploaded file.
+        source (Union[bytes, str, os.PathLike, BinaryIO]): Raw file content, a path, or the
+            spooled file of an upload. Files are rewound and parsed in place (CSVs on disk
+            via a memory map), so no in-memory copy is made.
+        filename (str): The name of the uploaded file, used to pick the parser.
         has_headers (bool, optional): Whether the file has headers. Defaults to True.
 
     Returns:
-        Dict[str, Any]: The extracted schema.
+        pd.DataFrame: The parsed table.
     """
     header = 0 if has_headers else None
-    
+    if isinstance(source, (bytes, bytearray)):
+        src, on_disk = BytesIO(source), False
+    elif isinstance(source, (str, os.PathLike)):
+        src, on_disk = source, True
+    else:
+        source.seek(0)
+        src, on_disk = spooled_file(source)
+
     if filename.endswith(".csv"):
-        df = pd.read_csv(BytesIO(file_bytes),nrows=None ,header=header)
+        df = pd.read_csv(src, nrows=None, header=header, memory_map=on_disk)
     elif filename.endswith((".xls", ".xlsx")):
-        df = pd.read_excel(BytesIO(file_bytes),nrows=None,header=header)
+        df = pd.read_excel(src, nrows=None, header=header)
     elif filename.endswith(".json"):
-        df = pd.read_json(BytesIO(file_bytes))
+        df = pd.read_json(src)
     else:
         raise ValueError({"error": "Unsupported file type"})
-    
+
     # Assign default column names if headers are absent
     if not has_headers:
         df.columns = [f"col_{i+1}" for i in range(len(df.columns))]
+    return df
+
+@timed("get_schema")
+def get_schema(source: Union[bytes, str, os.PathLike, BinaryIO],
+               filename: str,
+               has_headers:bool=True,
+               with_row_count:bool = True,
+               with_preview:bool = False,
+               with_profiles:bool = False
+            ) -> Dict[str, Any]:
+    """Extract schema from uploaded file.
+
+    Args:
+        source (Union[bytes, str, os.PathLike, BinaryIO]): The content of the uploaded file, a path, or its spooled file.
+        filename (str): The name of the uploaded file.
+        has_headers (bool, optional): Whether the file has headers. Defaults to True.
+        with_profiles (bool, optional): Include per-column profiles used to diff re-uploads. Defaults to False.
+
+    Returns:
+        Dict[str, Any]: The extracted schema.
+    """
+    df = read_frame(source, filename, has_headers=has_headers)
 
     cols = []
     used = set()
 
     for i, col in enumerate(df.columns):
-        original = str(cols).strip()
+        original = str(col).strip()
         normalized = original.lower().replace(" ", "_")
 
         # Handle reserved words or duplicates
@@ -88,13 +121,14 @@ def get_schema(file_bytes: bytes,
             "nullable": df[col].isnull().any(),
             "is_primary_key": (idx == 0)  # first column as PK if no ID added
         })
-        
-        errors = validate_schema(schema)
+
+    errors = validate_schema(schema)
 
     return {"columns": schema, 
             "row_preview": df.head(5).to_dict(orient="records") if with_preview else None,
             "row_count": int(len(df)) if with_row_count else None,
-            "validation_errors": errors
+            "validation_errors": errors,
+            "profiles": profile_columns(df) if with_profiles else None
             }
         
            
@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Tuple, Any
+from app.core.metrics import timed
+
+def frame_bytes(df: pd.DataFrame) -> int:
+    """Deep memory usage of a DataFrame in bytes."""
+    return int(df.memory_usage(deep=True).sum())
+
+def link_columns(schema: List[Dict]) -> List[str]:
+    """Columns link validation can use: primary keys and `id` / `*_id` columns.
+
+    Args:
+        schema (List[Dict]): column schema of the table
+
+    Returns:
+        List[str]: column names usable as either side of a link
+    """
+    keep = []
+    for col in schema:
+        name = col["name"].lower()
+        if col.get("is_primary_key") or name == "id" or name.endswith("_id"):
+            keep.append(col["name"])
+    return keep
+
+def _downcast_numeric(series: pd.Series) -> pd.Series:
+    if pd.api.types.is_bool_dtype(series):
+        return series
+    if pd.api.types.is_integer_dtype(series):
+        downcast = "unsigned" if len(series) and series.min() >= 0 else "integer"
+        return pd.to_numeric(series, downcast=downcast)
+    if pd.api.types.is_float_dtype(series):
+        smaller = series.astype(np.float32)
+        # only keep float32 when no precision is lost
+        if np.array_equal(smaller.to_numpy(dtype=np.float64), series.to_numpy(dtype=np.float64), equal_nan=True):
+            return smaller
+    return series
+
+def _is_string_column(series: pd.Series) -> bool:
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return False
+    return pd.api.types.infer_dtype(series, skipna=True) == "string"
+
+@timed("compact_frame")
+def compact_frame(df: pd.DataFrame,
+                  schema: List[Dict],
+                  category_ratio: float = 0.5,
+                  links_only: bool = False
+                ) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """Shrink a parsed DataFrame before it is stored in a session.
+
+    Numerics are downcast to the smallest width that holds every value and
+    repetitive strings become categoricals. The schema is not touched, so
+    DDL still uses the originally inferred types.
+
+    Args:
+        df (pd.DataFrame): parsed table
+        schema (List[Dict]): column schema of the table
+        category_ratio (float, optional): max unique/rows ratio for a string column to become categorical. Defaults to 0.5.
+        links_only (bool, optional): keep only columns usable by link validation. Defaults to False.
+
+    Returns:
+        Tuple[pd.DataFrame, Dict[str, Any]]: compacted frame and a report with bytes before/after
+    """
+    bytes_before = frame_bytes(df)
+    dropped = []
+
+    if links_only:
+        wanted = {name.lower() for name in link_columns(schema)}
+        keep = [c for c in df.columns if str(c).lower().replace(" ", "_") in wanted]
+        dropped = [str(c) for c in df.columns if c not in keep]
+        df = df[keep]
+
+    compacted = []
+    for i in range(df.shape[1]):
+        series = df.iloc[:, i]
+        if pd.api.types.is_numeric_dtype(series):
+            series = _downcast_numeric(series)
+        elif len(series) and _is_string_column(series):
+            if series.nunique(dropna=True) / len(series) <= category_ratio:
+                series = series.astype("category")
+        compacted.append(series)
+    if compacted:
+        df = pd.concat(compacted, axis=1)
+
+    return df, {
+        "bytes_before": bytes_before,
+        "bytes_after": frame_bytes(df),
+        "dropped_columns": dropped,
+    }
@@ -1,7 +1,12 @@
 from typing import List, Dict
 import random
+from app.core.metrics import timed
 
 # Naming heuristics
+def _name_matches(col_name: str, table_name: str) -> bool:
+    return (col_name == f"{table_name}_id") or (col_name.rstrip("_id") == table_name.rstrip("s"))
+
+@timed("suggest_links_by_name")
 def suggest_links_by_name(new_table: dict, existing_tables: list) -> List[Dict]:
     """Suggest links between columns of a new table and existing tables based on naming conventions.
 
@@ -19,7 +24,7 @@ def suggest_links_by_name(new_table: dict, existing_tables: list) -> List[Dict]:
             for t in existing_tables:
                 pk_candidates = [c for c in t["columns"] if c.get("is_primary_key")]
                 for pk in pk_candidates:
-                    if (col_name == f"{t['name']}_id") or (col_name.rstrip("_id") == t["name"].rstrip("s")):
+                    if _name_matches(col_name, t["name"]):
                         suggestions.append({
                             "from": f"{new_table['name']}.{col['name']}",
                             "to": f"{t['name']}.{pk['name']}",
@@ -27,6 +32,7 @@ def suggest_links_by_name(new_table: dict, existing_tables: list) -> List[Dict]:
                         })
     return suggestions
 
+@timed("boost_links_by_type")
 def boost_links_by_type(suggestions: list, tables: list) -> list:
     """Boost link suggestions based on column type matching.
 
@@ -49,6 +55,7 @@ def boost_links_by_type(suggestions: list, tables: list) -> list:
         boosted.append(s)
     return boosted
 
+@timed("validate_links_by_overlap")
 def validate_links_by_overlap(new_table_schema, dfs: dict, suggestions: list, sample_size=200) -> list:
     """Validate link suggestions by checking for value overlap.
 
@@ -85,4 +92,39 @@ def validate_links_by_overlap(new_table_schema, dfs: dict, suggestions: list, sa
                 s["confidence"] += 0.2
         validated.append(s)
 
-    return validated
\ No newline at end of file
+    return validated
+
+@timed("suggest_links_for_columns")
+def suggest_links_for_columns(table: dict, columns: list, tables: list) -> List[Dict]:
+    """Suggest links touching only the given columns of a table, in either direction.
+
+    Used when a table is replaced so that suggestions for unchanged columns are left alone.
+
+    Args:
+        table (dict): schema of the replaced table
+        columns (list): names of its changed or added columns
+        tables (list): all tables in the session
+
+    Returns:
+        List[Dict]: link suggestions from or to `columns`
+    """
+    subset = {**table, "columns": [c for c in table["columns"] if c["name"] in set(columns)]}
+    others = [t for t in tables if t["name"] != table["name"]]
+
+    suggestions = suggest_links_by_name(subset, others)  # outgoing
+
+    # incoming links can only target a changed key column
+    pk_candidates = [c for c in subset["columns"] if c.get("is_primary_key")]
+    if not pk_candidates:
+        return suggestions
+    for other in others:
+        for col in other["columns"]:
+            col_name = col["name"].lower()
+            if (col_name.endswith("_id") or col_name == "id") and _name_matches(col_name, table["name"]):
+                for pk in pk_candidates:
+                    suggestions.append({
+                        "from": f"{other['name']}.{col['name']}",
+                        "to": f"{table['name']}.{pk['name']}",
+                        "confidence": 0.5
+                    })
+    return suggestions
@@ -1,38 +1,60 @@
+from typing import Callable, Optional
 from app.services.type_mapper import map_to_orm as map_orm_type
+from app.core.metrics import timed
+from app.services.schema_graph import get_graph
 
-def generate_orm(session: dict) -> list[str]:
-    lines = [
-        "from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey",
-        "from sqlalchemy.orm import relationship",
-        "from sqlalchemy.ext.declarative import declarative_base",
-        "",
-        "Base = declarative_base()",
-        ""
-    ]
+ORM_HEADER = [
+    "from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey",
+    "from sqlalchemy.orm import relationship",
+    "from sqlalchemy.ext.declarative import declarative_base",
+    "",
+    "Base = declarative_base()",
+    ""
+]
 
-    for table in session["tables"]:
-        class_name = table["name"].capitalize()
-        lines.append(f"class {class_name}(Base):")
-        lines.append(f"    __tablename__ = '{table['name']}'")
-
-        for col in table["columns"]:
-            sa_type = map_orm_type(col["inferred_type"])
-            col_def = f"Column({sa_type}"
-            if col.get("is_primary_key"):
-                col_def += ", primary_key=True"
-            if not col["nullable"]:
-                col_def += ", nullable=False"
-            col_def += ")"
-            lines.append(f"    {col['name']} = {col_def}")
-
-        # Add relationships
-        for link in session["links"]:
-            if link["from"].startswith(table["name"] + "."):
-                _, local_col = link["from"].split(".")
-                ref_table, _ = link["to"].split(".")
-                ref_class = ref_table.capitalize()
-                lines.append(f"    {ref_table} = relationship('{ref_class}')")
-
-        lines.append("")  # spacing between classes
+def table_orm(table: dict, links: list) -> list[str]:
+    """Declarative class for one table, followed by a blank line."""
+    lines = []
+    class_name = table["name"].capitalize()
+    lines.append(f"class {class_name}(Base):")
+    lines.append(f"    __tablename__ = '{table['name']}'")
+
+    for col in table["columns"]:
+        sa_type = map_orm_type(col["inferred_type"])
+        col_def = f"Column({sa_type}"
+        if col.get("is_primary_key"):
+            col_def += ", primary_key=True"
+        if not col["nullable"]:
+            col_def += ", nullable=False"
+        col_def += ")"
+        lines.append(f"    {col['name']} = {col_def}")
+
+    # Add relationships
+    for link in links:
+        if link["from"].startswith(table["name"] + "."):
+            _, local_col = link["from"].split(".")
+            ref_table, _ = link["to"].split(".")
+            ref_class = ref_table.capitalize()
+            lines.append(f"    {ref_table} = relationship('{ref_class}')")
+
+    lines.append("")  # spacing between classes
+    return lines
+
+@timed("generate_orm")
+def generate_orm(session: dict, block: Optional[Callable] = None) -> list[str]:
+    """SQLAlchemy models for a session, one class per table.
 
+    Args:
+        session (dict): the session holding tables and links
+        block (Optional[Callable], optional): block(table, links, build) returning the lines
+            of one table, e.g. from a cache (see artifact_cache). Defaults to build(table, links).
+
+    Returns:
+        list[str]: lines of the generated module
+    """
+    block = block or (lambda table, links, build: build(table, links))
+    graph = get_graph(session)
+    lines = list(ORM_HEADER)
+    for table in session["tables"]:
+        lines += block(table, graph.out_links.get(table["name"], []), table_orm)
     return lines
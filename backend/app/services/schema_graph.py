@@ -0,0 +1,283 @@
+import heapq
+from collections import deque
+from typing import Dict, List, Optional, Set, Tuple
+from app.core.metrics import timed
+
+def _table_of(field: str) -> str:
+    return field.split(".", 1)[0]
+
+class SchemaGraph:
+    """Adjacency-list graph of a session's tables, with links as directed edges (referencing -> referenced).
+
+    Tables and links are added or removed one at a time. Derived results (component
+    ordering, join paths) are computed lazily and cached until the next change.
+    """
+
+    def __init__(self):
+        self.tables: Dict[str, int] = {}              # name -> upload position
+        self.out_links: Dict[str, List[Dict]] = {}    # table -> links defined on it
+        self.out_edges: Dict[str, Dict[str, int]] = {}  # table -> referenced table -> link count
+        self.in_edges: Dict[str, Dict[str, int]] = {}   # table -> referencing table -> link count
+        self.link_count = 0
+        self._order: Optional[Tuple[List[str], List[Dict]]] = None
+        self._components: Optional[List[List[str]]] = None
+        self._paths: Dict[str, Dict[str, Optional[str]]] = {}      # BFS parents by source table
+
+    # maintenance
+    def _changed(self):
+        self._order = None
+        self._components = None
+        self._paths.clear()
+
+    def _node(self, name: str):
+        self.out_links.setdefault(name, [])
+        self.out_edges.setdefault(name, {})
+        self.in_edges.setdefault(name, {})
+
+    def add_table(self, name: str):
+        if name in self.tables:
+            return
+        self.tables[name] = len(self.tables)
+        self._node(name)
+        self._changed()
+
+    def add_link(self, link: Dict):
+        src, dst = _table_of(link["from"]), _table_of(link["to"])
+        self._node(src)
+        self._node(dst)
+        self.out_links[src].append(link)
+        self.out_edges[src][dst] = self.out_edges[src].get(dst, 0) + 1
+        self.in_edges[dst][src] = self.in_edges[dst].get(src, 0) + 1
+        self.link_count += 1
+        self._changed()
+
+    def remove_link(self, link: Dict):
+        src, dst = _table_of(link["from"]), _table_of(link["to"])
+        links = self.out_links.get(src, [])
+        match = next((l for l in links if l["from"] == link["from"] and l["to"] == link["to"]), None)
+        if match is None:
+            return
+        links.remove(match)
+        for edges, a, b in ((self.out_edges, src, dst), (self.in_edges, dst, src)):
+            edges[a][b] -= 1
+            if not edges[a][b]:
+                del edges[a][b]
+        self.link_count -= 1
+        self._changed()
+
+    # analysis
+    def _known_successors(self, name: str) -> List[str]:
+        return [t for t in self.out_edges.get(name, {}) if t in self.tables]
+
+    def components(self) -> List[List[str]]:
+        """Strongly connected components (iterative Tarjan), dependencies before dependents."""
+        if self._components is not None:
+            return self._components
+
+        index: Dict[str, int] = {}
+        low: Dict[str, int] = {}
+        stack: List[str] = []
+        on_stack: Set[str] = set()
+        components = []
+        counter = 0
+
+        for root in self.tables:
+            if root in index:
+                continue
+            index[root] = low[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack.add(root)
+            work = [(root, iter(self._known_successors(root)))]
+
+            while work:
+                v, successors = work[-1]
+                advanced = False
+                for w in successors:
+                    if w not in index:
+                        index[w] = low[w] = counter
+                        counter += 1
+                        stack.append(w)
+                        on_stack.add(w)
+                        work.append((w, iter(self._known_successors(w))))
+                        advanced = True
+                        break
+                    if w in on_stack:
+                        low[v] = min(low[v], index[w])
+                if advanced:
+                    continue
+
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[v])
+                if low[v] == index[v]:
+                    component = []
+                    while True:
+                        w = stack.pop()
+                        on_stack.discard(w)
+                        component.append(w)
+                        if w == v:
+                            break
+                    components.append(sorted(component, key=self.tables.get))
+
+        self._components = components
+        return components
+
+    def _component_order(self, component: List[str]) -> List[str]:
+        """Depth-first post-order inside a cycle, so only back edges point at later tables."""
+        members = set(component)
+        seen: Set[str] = set()
+        order: List[str] = []
+        for root in component:
+            if root in seen:
+                continue
+            seen.add(root)
+            work = [(root, iter(sorted((t for t in self._known_successors(root) if t in members), key=self.tables.get)))]
+            while work:
+                v, successors = work[-1]
+                for w in successors:
+                    if w not in seen:
+                        seen.add(w)
+                        work.append((w, iter(sorted((t for t in self._known_successors(w) if t in members), key=self.tables.get))))
+                        break
+                else:
+                    work.pop()
+                    order.append(v)
+        return order
+
+    def creation_order(self) -> Tuple[List[str], List[Dict]]:
+        """Order in which tables can be created, plus links that must be added afterwards.
+
+        Referenced tables come before the tables that reference them, keeping upload
+        order wherever the dependencies allow. Inside a cycle, tables are created in
+        depth-first post-order and only the links closing the cycle (whose target is
+        created later than their source) are deferred.
+
+        Returns:
+            Tuple[List[str], List[Dict]]: table names in creation order, and deferred links
+        """
+        if self._order is not None:
+            return self._order
+
+        components = self.components()
+        component_of = {t: i for i, comp in enumerate(components) for t in comp}
+        rank = [self.tables[comp[0]] for comp in components]
+
+        # condensation: component -> number of distinct components it depends on
+        pending = [0] * len(components)
+        dependents: List[Set[int]] = [set() for _ in components]
+        for i, comp in enumerate(components):
+            for t in comp:
+                for ref in self._known_successors(t):
+                    j = component_of[ref]
+                    if j != i and i not in dependents[j]:
+                        dependents[j].add(i)
+                        pending[i] += 1
+
+        ready = [(rank[i], i) for i in range(len(components)) if not pending[i]]
+        heapq.heapify(ready)
+        order: List[str] = []
+        while ready:
+            _, i = heapq.heappop(ready)
+            comp = components[i]
+            order.extend(self._component_order(comp) if len(comp) > 1 else comp)
+            for j in dependents[i]:
+                pending[j] -= 1
+                if not pending[j]:
+                    heapq.heappush(ready, (rank[j], j))
+
+        position = {t: i for i, t in enumerate(order)}
+        deferred = [
+            link
+            for t in order
+            for link in self.out_links.get(t, [])
+            if _table_of(link["to"]) in position and position[_table_of(link["to"])] > position[t]
+        ]
+        self._order = (order, deferred)
+        return self._order
+
+    def cycles(self) -> List[List[str]]:
+        """Components that contain a foreign-key cycle (including self references)."""
+        return [
+            comp for comp in self.components()
+            if len(comp) > 1 or comp[0] in self.out_edges.get(comp[0], {})
+        ]
+
+    def join_path(self, source: str, target: str) -> Optional[List[Dict]]:
+        """Shortest chain of links joining two tables, following links in either direction.
+
+        Breadth-first search results are cached per source table until the graph changes.
+
+        Returns:
+            Optional[List[Dict]]: links along the path (empty for the same table), or None if unreachable
+        """
+        if source not in self.out_edges or target not in self.out_edges:
+            return None
+        parents = self._paths.get(source)
+        if parents is None:
+            parents = {source: None}
+            queue = deque([source])
+            while queue:
+                t = queue.popleft()
+                for nxt in list(self.out_edges[t]) + list(self.in_edges[t]):
+                    if nxt not in parents:
+                        parents[nxt] = t
+                        queue.append(nxt)
+            self._paths[source] = parents
+
+        if target not in parents:
+            return None
+        path = []
+        t = target
+        while parents[t] is not None:
+            prev = parents[t]
+            path.append(self._edge_link(prev, t))
+            t = prev
+        return path[::-1]
+
+    def _edge_link(self, a: str, b: str) -> Dict:
+        if b in self.out_edges[a]:
+            return next(l for l in self.out_links[a] if _table_of(l["to"]) == b)
+        return next(l for l in self.out_links[b] if _table_of(l["to"]) == a)
+
+    def to_dict(self) -> Dict:
+        order, deferred = self.creation_order()
+        return {
+            "tables": list(self.tables),
+            "adjacency": {t: sorted(refs) for t, refs in self.out_edges.items()},
+            "link_count": self.link_count,
+            "creation_order": order,
+            "deferred_links": [{"from": l["from"], "to": l["to"]} for l in deferred],
+            "components": self.components(),
+            "cycles": self.cycles(),
+        }
+
+@timed("build_graph")
+def build_graph(session: dict) -> SchemaGraph:
+    graph = SchemaGraph()
+    for table in session["tables"]:
+        graph.add_table(table["name"])
+    for link in session["links"]:
+        graph.add_link(link)
+    return graph
+
+def get_graph(session: dict) -> SchemaGraph:
+    """Session graph, built on first use and maintained incrementally afterwards.
+
+    It is rebuilt if tables or links were added or removed without going through
+    the graph (for example sessions assembled directly in tests).
+    """
+    graph = session.get("graph")
+    if graph is None or len(graph.tables) != len({t["name"] for t in session["tables"]}) or graph.link_count != len(session["links"]):
+        graph = build_graph(session)
+        session["graph"] = graph
+    return graph
+
+def reset_graph(session: dict):
+    session.pop("graph", None)
+
+def tables_in_order(session: dict, order: List[str]) -> List[Dict]:
+    """Session tables sorted into creation order (tables sharing a name keep upload order)."""
+    position = {name: i for i, name in enumerate(order)}
+    return sorted(session["tables"], key=lambda t: position.get(t["name"], len(position)))
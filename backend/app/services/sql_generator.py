@@ -1,29 +1,66 @@
+from typing import Callable, Optional
 from app.services.type_mapper import map_sql_type
+from app.core.metrics import timed
+from app.services.schema_graph import get_graph, tables_in_order
 
-def generate_sql(session: dict) -> list[str]:
-    stmts = []
-    for table in session["tables"]:
-        cols = []
-        for col in table["columns"]:
-            col_def = f"{col['name']} {map_sql_type(col['inferred_type'])}"
-            if not col["nullable"]:
-                col_def += " NOT NULL"
-            if col.get("is_primary_key"):
-                col_def += " PRIMARY KEY"
-            cols.append(col_def)
-
-        # add foreign keys
-        for link in session["links"]:
-            if link["from"].startswith(table["name"] + "."):
-                _, col_name = link["from"].split(".")
-                ref_table, ref_col = link["to"].split(".")
-                cols.append(f"FOREIGN KEY ({col_name}) REFERENCES {ref_table}({ref_col})")
-
-        # turn into a CREATE TABLE statement (line by line)
-        stmt_lines = [f"CREATE TABLE {table['name']} ("]
-        stmt_lines += [f"  {c}," for c in cols[:-1]]  # all but last with comma
-        stmt_lines.append(f"  {cols[-1]}")            # last without comma
-        stmt_lines.append(");")
-        stmts += stmt_lines + [""]  # add blank line after each table
+def table_sql(table: dict, links: list) -> list[str]:
+    """CREATE TABLE statement for one table, followed by a blank line."""
+    cols = []
+    for col in table["columns"]:
+        col_def = f"{col['name']} {map_sql_type(col['inferred_type'])}"
+        if not col["nullable"]:
+            col_def += " NOT NULL"
+        if col.get("is_primary_key"):
+            col_def += " PRIMARY KEY"
+        cols.append(col_def)
+
+    # add foreign keys
+    for link in links:
+        if link["from"].startswith(table["name"] + "."):
+            _, col_name = link["from"].split(".")
+            ref_table, ref_col = link["to"].split(".")
+            cols.append(f"FOREIGN KEY ({col_name}) REFERENCES {ref_table}({ref_col})")
+
+    # turn into a CREATE TABLE statement (line by line)
+    stmt_lines = [f"CREATE TABLE {table['name']} ("]
+    stmt_lines += [f"  {c}," for c in cols[:-1]]  # all but last with comma
+    stmt_lines.append(f"  {cols[-1]}")            # last without comma
+    stmt_lines.append(");")
+    return stmt_lines + [""]  # add blank line after each table
 
+def alter_sql(deferred: list) -> list[str]:
+    """ALTER TABLE statements for foreign keys that close a cycle."""
+    stmts = []
+    for link in deferred:
+        table, col_name = link["from"].split(".")
+        ref_table, ref_col = link["to"].split(".")
+        stmts.append(f"ALTER TABLE {table} ADD CONSTRAINT fk_{table}_{col_name}")
+        stmts.append(f"  FOREIGN KEY ({col_name}) REFERENCES {ref_table}({ref_col});")
+        stmts.append("")
     return stmts
+
+def inline_links(graph, table_name: str, deferred: list) -> list:
+    """Links of a table that can be declared inside its CREATE TABLE."""
+    skip = {(l["from"], l["to"]) for l in deferred}
+    return [l for l in graph.out_links.get(table_name, []) if (l["from"], l["to"]) not in skip]
+
+@timed("generate_sql")
+def generate_sql(session: dict, block: Optional[Callable] = None) -> list[str]:
+    """CREATE TABLE statements for a session, plus ALTER TABLE for links closing a cycle.
+
+    Args:
+        session (dict): the session holding tables and links
+        block (Optional[Callable], optional): block(table, links, build) returning the lines
+            of one table, e.g. from a cache (see artifact_cache). Defaults to build(table, links).
+
+    Returns:
+        list[str]: lines of the generated SQL
+    """
+    # referenced tables are created first; links closing a cycle are added afterwards
+    block = block or (lambda table, links, build: build(table, links))
+    graph = get_graph(session)
+    order, deferred = graph.creation_order()
+    stmts = []
+    for table in tables_in_order(session, order):
+        stmts += block(table, inline_links(graph, table["name"], deferred), table_sql)
+    return stmts + alter_sql(deferred)
@@ -0,0 +1,74 @@
+import pandas as pd
+from typing import Dict, List, Tuple, Iterable
+
+def _fingerprint(series: pd.Series) -> int:
+    try:
+        hashed = pd.util.hash_pandas_object(series, index=False)
+    except TypeError:
+        # unhashable cells (nested JSON lists/dicts)
+        hashed = pd.util.hash_pandas_object(series.astype(str), index=False)
+    return int(hashed.sum())
+
+def profile_columns(df: pd.DataFrame) -> Dict[str, Dict]:
+    """Cheap per-column profile used to detect which columns changed between uploads.
+
+    Args:
+        df (pd.DataFrame): parsed table with normalized column names
+
+    Returns:
+        Dict[str, Dict]: profile by column name (type, row and null counts, content fingerprint)
+    """
+    profiles = {}
+    for i, col in enumerate(df.columns):
+        series = df.iloc[:, i]
+        profiles[str(col)] = {
+            "inferred_type": str(series.dtype),
+            "rows": int(len(series)),
+            "null_count": int(series.isnull().sum()),
+            "fingerprint": _fingerprint(series),
+        }
+    return profiles
+
+def diff_columns(old: Dict[str, Dict], new: Dict[str, Dict]) -> Dict[str, List[str]]:
+    """Compare two sets of column profiles.
+
+    Args:
+        old (Dict[str, Dict]): profiles of the stored table
+        new (Dict[str, Dict]): profiles of the uploaded replacement
+
+    Returns:
+        Dict[str, List[str]]: column names grouped into added / removed / changed / unchanged
+    """
+    diff = {"added": [], "removed": [], "changed": [], "unchanged": []}
+    for name, profile in new.items():
+        if name not in old:
+            diff["added"].append(name)
+        elif old[name] != profile:
+            diff["changed"].append(name)
+        else:
+            diff["unchanged"].append(name)
+    diff["removed"] = [name for name in old if name not in new]
+    return diff
+
+def merge_columns(old_columns: List[Dict], new_columns: List[Dict], unchanged: Iterable[str]) -> List[Dict]:
+    """Column schema for a replaced table: stored entries for unchanged columns, fresh ones otherwise.
+
+    The primary key always follows the fresh inference, since a column can keep
+    its content while moving in or out of the key position.
+    """
+    keep = set(unchanged)
+    stored = {c["name"]: c for c in old_columns}
+    merged = []
+    for col in new_columns:
+        if col["name"] in keep and col["name"] in stored:
+            col = {**stored[col["name"]], "is_primary_key": col.get("is_primary_key", False)}
+        merged.append(col)
+    return merged
+
+def split_links(links: List[Dict], table: str, columns: Iterable[str]) -> Tuple[List[Dict], List[Dict]]:
+    """Split links into those touching `table`.`columns` (either end) and the rest."""
+    fields = {f"{table}.{c}" for c in columns}
+    touching, rest = [], []
+    for link in links:
+        (touching if link["from"] in fields or link["to"] in fields else rest).append(link)
+    return touching, rest
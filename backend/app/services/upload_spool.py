@@ -0,0 +1,136 @@
+import io
+import json
+import os
+import tempfile
+from typing import BinaryIO, Iterable, Tuple
+
+class UploadTooLarge(ValueError):
+    """Raised when an upload exceeds the configured maximum size."""
+
+    def __init__(self, limit: int):
+        super().__init__(f"Upload exceeds the maximum size of {limit} bytes")
+        self.limit = limit
+
+def spooled_upload(upload, max_bytes: int) -> Tuple[BinaryIO, int]:
+    """Underlying file of an UploadFile and its size, without copying it.
+
+    Starlette has already spooled the multipart body into a SpooledTemporaryFile
+    (in memory up to 1 MiB, a temp file on disk above that), which is closed
+    once the response has been sent. Parsers read straight from that file.
+
+    Args:
+        upload (UploadFile): the incoming file
+        max_bytes (int): reject uploads larger than this (0 disables the limit)
+
+    Raises:
+        UploadTooLarge: If the upload is larger than `max_bytes`.
+
+    Returns:
+        Tuple[BinaryIO, int]: the spooled file, rewound, and its size in bytes
+    """
+    f = upload.file
+    size = upload.size
+    if size is None:
+        size = f.seek(0, os.SEEK_END)
+    if max_bytes and size > max_bytes:
+        raise UploadTooLarge(max_bytes)
+    f.seek(0)
+    return f, size
+
+def spooled_file(f: BinaryIO) -> Tuple[BinaryIO, bool]:
+    """File object to parse for an upload, and whether it is a real file on disk (so it can be memory-mapped).
+
+    SpooledTemporaryFile has no public way to reach its buffer: it is kept in the
+    private `_file` (a BytesIO until the file rolls over to a TemporaryFile). Calling
+    fileno() on the wrapper itself would force a rollover, so if `_file` ever goes
+    away the wrapper is returned as is and treated as in memory.
+    """
+    if isinstance(f, tempfile.SpooledTemporaryFile):
+        inner = getattr(f, "_file", None)
+        if inner is None:
+            return f, False
+        f = inner
+    try:
+        f.fileno()
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        return f, False
+    return f, True
+
+class UploadSizeLimit:
+    """ASGI middleware capping the request body size of upload endpoints.
+
+    Requests announcing a larger Content-Length are rejected before anything is
+    read. Otherwise the body is counted as it streams in, so chunked requests are
+    cut off as soon as they cross the limit instead of after being spooled in full.
+
+    Args:
+        app: the wrapped ASGI app
+        max_bytes (int): maximum body size in bytes (0 disables the limit)
+        paths (Iterable[str]): request paths the limit applies to
+        on_reject (callable, optional): called once for every rejected request
+    """
+
+    def __init__(self, app, max_bytes: int, paths: Iterable[str], on_reject=None):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.paths = set(paths)
+        self.on_reject = on_reject
+
+    async def __call__(self, scope, receive, send):
+        if (not self.max_bytes or scope["type"] != "http"
+                or scope["method"] != "POST" or scope["path"] not in self.paths):
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers", []))
+        length = headers.get(b"content-length", b"").decode()
+        if length.isdigit() and int(length) > self.max_bytes:
+            await self._reject(send)
+            return
+
+        received = 0
+        rejected = False
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received, rejected
+            if rejected:
+                return {"type": "http.disconnect"}
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    rejected = True
+                    if not response_started:
+                        await self._reject(send)
+                    # the app sees a client disconnect and stops reading
+                    return {"type": "http.disconnect"}
+            return message
+
+        async def guarded_send(message):
+            nonlocal response_started
+            if rejected:
+                return
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except Exception:
+            if not rejected:
+                raise
+
+    async def _reject(self, send):
+        if self.on_reject is not None:
+            self.on_reject()
+        body = json.dumps({"detail": str(UploadTooLarge(self.max_bytes))}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
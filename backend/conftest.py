@@ -0,0 +1 @@
+# Root conftest: lets pytest put backend/ on sys.path so `app` and `tests` are importable
@@ -0,0 +1,327 @@
+#tests/api_test.py
+
+import asyncio
+from io import BytesIO
+import numpy as np
+import pandas as pd
+import pytest # type: ignore
+from fastapi.testclient import TestClient # type: ignore
+
+from app.main import app
+from app.api import routes
+from app.api.routes import SESSIONS
+from app.services.upload_spool import UploadSizeLimit, spooled_upload, spooled_file
+
+client = TestClient(app)
+
+
+def upload(name: str, content: bytes, **params):
+    response = client.post("/api/upload", files={"file": (name, content)}, params=params)
+    assert response.status_code in (200, 201), response.text
+    return response.json()
+
+
+def primary_keys(table: dict) -> list:
+    return [c["name"] for c in table["columns"] if c.get("is_primary_key")]
+
+
+# replace mode: primary key
+def test_replace_moves_primary_key_to_new_first_column():
+    sid = upload("users.csv", b"id,name\n1,a\n2,b\n")["session_id"]
+    upload("orders.csv", b"id,users_id\n1,1\n", session_id=sid)
+    client.post("/api/accept_link", json={"session_id": sid, "from_field": "orders.users_id", "to_field": "users.id"})
+
+    result = upload("users.csv", b"code,id,name\nx,1,a\ny,2,b\n", session_id=sid, replace=True)
+
+    assert result["diff"]["unchanged"] == ["id", "name"]
+    assert primary_keys(result["schema"]) == ["code"]
+    # users.id is no longer a key, so the confirmed link to it cannot stay
+    assert [(l["from"], l["to"]) for l in result["invalidated_links"]] == [("orders.users_id", "users.id")]
+    assert SESSIONS[sid]["links"] == []
+    sql = client.get(f"/api/generate/{sid}").text
+    assert sql.count("PRIMARY KEY") == 2
+    assert "REFERENCES users(id)" not in sql
+
+
+def test_replace_restores_primary_key_when_old_key_column_is_removed():
+    sid = upload("users.csv", b"code,id,name\nx,1,a\ny,2,b\n")["session_id"]
+    result = upload("users.csv", b"id,name\n1,a\n2,b\n", session_id=sid, replace=True)
+
+    assert result["diff"]["removed"] == ["code"]
+    assert primary_keys(result["schema"]) == ["id"]
+    assert client.get(f"/api/generate/{sid}").text.count("PRIMARY KEY") == 1
+
+
+# replace mode: diff, links and suggestions
+def test_replace_reports_added_removed_and_changed_columns():
+    sid = upload("orders.csv", b"id,amount,note\n1,5,a\n2,6,b\n")["session_id"]
+    result = upload("orders.csv", b"id,amount,status\n1,5,x\n2,7,y\n", session_id=sid, replace=True)
+
+    assert result["table_replaced"] == "orders"
+    assert result["diff"] == {"added": ["status"], "removed": ["note"], "changed": ["amount"], "unchanged": ["id"]}
+    assert len(SESSIONS[sid]["tables"]) == 1
+
+
+def test_replace_drops_and_recomputes_suggestions_on_dirty_columns():
+    sid = upload("users.csv", b"id,name\n1,a\n2,b\n")["session_id"]
+    upload("products.csv", b"id,label\n1,x\n", session_id=sid)
+    upload("orders.csv", b"id,users_id\n1,1\n2,2\n", session_id=sid)
+    upload("payments.csv", b"id,orders_id\n1,1\n", session_id=sid)
+    kept = {"from": "payments.orders_id", "to": "orders.id"}
+
+    result = upload("orders.csv", b"id,products_id\n1,1\n2,1\n", session_id=sid, replace=True)
+
+    assert [(s["from"], s["to"]) for s in result["suggested_links"]] == [("orders.products_id", "products.id")]
+    remaining = [(s["from"], s["to"]) for s in SESSIONS[sid]["suggested_links"]]
+    assert ("orders.users_id", "users.id") not in remaining
+    assert (kept["from"], kept["to"]) in remaining
+    assert ("orders.products_id", "products.id") in remaining
+
+
+def test_replace_drops_confirmed_links_on_removed_columns():
+    sid = upload("users.csv", b"id,name\n1,a\n")["session_id"]
+    upload("orders.csv", b"id,users_id,amount\n1,1,5\n", session_id=sid)
+    client.post("/api/accept_link", json={"session_id": sid, "from_field": "orders.users_id", "to_field": "users.id"})
+
+    unchanged = upload("orders.csv", b"id,users_id,amount\n1,1,9\n", session_id=sid, replace=True)
+    assert unchanged["invalidated_links"] == []
+    assert len(SESSIONS[sid]["links"]) == 1
+
+    removed = upload("orders.csv", b"id,amount\n1,9\n", session_id=sid, replace=True)
+    assert [(l["from"], l["to"]) for l in removed["invalidated_links"]] == [("orders.users_id", "users.id")]
+    assert SESSIONS[sid]["links"] == []
+    assert "FOREIGN KEY" not in client.get(f"/api/generate/{sid}").text
+
+
+def test_failed_replace_leaves_the_session_unchanged():
+    sid = upload("users.csv", b"id,name\n1,a\n2,b\n")["session_id"]
+    upload("orders.csv", b"id,amount\n1,5\n2,6\n", session_id=sid)
+    session = SESSIONS[sid]
+    before_sql = client.get(f"/api/generate/{sid}").text
+    before = {key: dict(session[key]) for key in ("dfs", "memory", "profiles")}
+    before_columns = [dict(c) for c in session["tables"][1]["columns"]]
+    before_suggestions = list(session["suggested_links"])
+
+    # the null users_id makes overlap validation fail
+    response = client.post(
+        "/api/upload",
+        files={"file": ("orders.csv", b"id,users_id\n1,\n2,1\n")},
+        params={"session_id": sid, "replace": True, "deep_check": True},
+    )
+
+    assert response.status_code == 400
+    for key, entries in before.items():
+        assert all(session[key][name] is value for name, value in entries.items())
+    assert session["tables"][1]["columns"] == before_columns
+    assert session["suggested_links"] == before_suggestions
+    assert client.get(f"/api/generate/{sid}").text == before_sql
+
+
+def test_replace_rebuilds_cached_sql_only_for_affected_tables():
+    sid = upload("users.csv", b"id,name\n1,a\n")["session_id"]
+    upload("orders.csv", b"id,amount\n1,5\n", session_id=sid)
+    client.get(f"/api/generate/{sid}")
+    before = dict(SESSIONS[sid]["artifacts"]["sql"])
+
+    upload("orders.csv", b"id,amount,status\n1,5,x\n", session_id=sid, replace=True)
+    sql = client.get(f"/api/generate/{sid}").text
+    after = SESSIONS[sid]["artifacts"]["sql"]
+
+    assert after["0:users"] is before["0:users"]
+    assert after["1:orders"] is not before["1:orders"]
+    assert "status TEXT" in sql
+
+
+# schema graph
+def test_graph_endpoint_reports_order_cycles_and_join_path():
+    sid = upload("orders.csv", b"id,users_id\n1,1\n")["session_id"]
+    upload("users.csv", b"id,orders_id\n1,1\n", session_id=sid)
+    client.post("/api/link", json={"session_id": sid, "from_field": "orders.users_id", "to_field": "users.id"})
+    client.post("/api/link", json={"session_id": sid, "from_field": "users.orders_id", "to_field": "orders.id"})
+
+    graph = client.get(f"/api/session/{sid}/graph", params={"from_table": "users", "to_table": "orders"}).json()
+    assert graph["cycles"] == [["orders", "users"]]
+    assert graph["creation_order"] == ["users", "orders"]
+    assert graph["deferred_links"] == [{"from": "users.orders_id", "to": "orders.id"}]
+    assert len(graph["join_path"]) == 1
+
+
+def test_graph_is_rebuilt_after_rename_table():
+    sid = upload("users.csv", b"id,name\n1,a\n")["session_id"]
+    client.get(f"/api/session/{sid}/graph")
+    old_graph = SESSIONS[sid]["graph"]
+
+    client.post(f"/api/session/{sid}/rename_table", json={"table_name": "users", "new_name": "people"})
+    graph = client.get(f"/api/session/{sid}/graph").json()
+
+    assert graph["tables"] == ["people"]
+    assert SESSIONS[sid]["graph"] is not old_graph
+
+
+# session memory cap
+def test_rejected_first_upload_does_not_leave_an_empty_session(monkeypatch):
+    monkeypatch.setattr(routes, "MAX_SESSION_BYTES", 10)
+    response = client.post("/api/upload", files={"file": ("users.csv", b"id,name\n1,a\n")})
+
+    assert response.status_code == 413
+    assert SESSIONS == {}
+
+
+def test_upload_over_cap_is_rejected_without_changing_the_session(monkeypatch):
+    sid = upload("users.csv", b"id,name\n1,a\n")["session_id"]
+    monkeypatch.setattr(routes, "MAX_SESSION_BYTES", SESSIONS[sid]["memory"]["users"]["bytes_after"] + 1)
+    response = client.post("/api/upload", files={"file": ("orders.csv", b"id,users_id\n1,1\n")}, params={"session_id": sid})
+
+    assert response.status_code == 413
+    assert [t["name"] for t in SESSIONS[sid]["tables"]] == ["users"]
+
+
+# compaction
+def test_upload_without_compaction_stores_the_parsed_frame_unchanged():
+    content = b"id,name,amount\n1,a,1.5\n2,a,2.5\n"
+    sid = upload("orders.csv", content, compact=False)["session_id"]
+    stored = SESSIONS[sid]["dfs"]["orders"]
+
+    assert stored.equals(pd.read_csv(BytesIO(content)))
+    assert stored["id"].dtype == np.int64
+    assert SESSIONS[sid]["memory"]["orders"]["dropped_columns"] == []
+
+
+def test_upload_with_compaction_keeps_link_columns_downcast():
+    sid = upload("orders.csv", b"id,users_id,note\n1,1,a\n2,3,b\n")["session_id"]
+    stored = SESSIONS[sid]["dfs"]["orders"]
+
+    assert list(stored.columns) == ["id", "users_id"]
+    assert stored["id"].dtype == np.uint8
+    assert SESSIONS[sid]["memory"]["orders"]["dropped_columns"] == ["note"]
+
+
+# rename
+def test_rename_moves_per_table_state_to_the_new_name():
+    sid = upload("users.csv", b"id,name\n1,a\n")["session_id"]
+    client.post(f"/api/session/{sid}/rename_table", json={"table_name": "users", "new_name": "people"})
+
+    for key in ("dfs", "memory", "profiles"):
+        assert list(SESSIONS[sid][key]) == ["people"]
+
+    result = upload("people.csv", b"id,name\n1,a\n", session_id=sid, replace=True)
+    assert result["diff"]["unchanged"] == ["id", "name"]
+    assert list(SESSIONS[sid]["memory"]) == ["people"]
+
+
+# upload size limit
+@pytest.fixture
+def upload_limit(monkeypatch):
+    """Shrink the request body limit of the UploadSizeLimit middleware."""
+    client.get("/core/")  # make sure the middleware stack is built
+    layer = app.middleware_stack
+    while not isinstance(layer, UploadSizeLimit):
+        layer = layer.app
+    monkeypatch.setattr(layer, "max_bytes", 1024)
+    return layer
+
+
+def metric_value(line_prefix: str) -> float:
+    lines = client.get("/core/metrics").text.splitlines()
+    return sum(float(l.rsplit(" ", 1)[1]) for l in lines if l.startswith(line_prefix))
+
+
+def test_upload_rejected_from_content_length(upload_limit):
+    response = client.post("/api/upload", files={"file": ("big.csv", b"id\n" + b"1\n" * 2000)})
+    assert response.status_code == 413
+    assert SESSIONS == {}
+
+
+def test_streamed_upload_rejected_once_it_crosses_the_limit(upload_limit):
+    def body():
+        for _ in range(100):
+            yield b"x" * 512
+
+    response = client.post(
+        "/api/upload",
+        content=body(),
+        headers={"content-type": "multipart/form-data; boundary=b"},
+    )
+    assert response.status_code == 413
+    assert "content-length" not in response.request.headers
+    assert SESSIONS == {}
+
+
+def test_size_limit_stops_reading_the_body_at_the_limit():
+    chunks = [{"type": "http.request", "body": b"x" * 512, "more_body": True} for _ in range(100)]
+    pulled, sent = [], []
+
+    async def receive():
+        pulled.append(1)
+        return chunks.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    async def drain(scope, receive, send):
+        while (await receive())["type"] == "http.request":
+            pass
+
+    scope = {"type": "http", "method": "POST", "path": "/api/upload", "headers": []}
+    asyncio.run(UploadSizeLimit(drain, max_bytes=1024, paths=["/api/upload"])(scope, receive, send))
+
+    assert len(pulled) == 3
+    assert sent[0]["status"] == 413
+
+
+def test_rejected_upload_is_counted_in_request_metrics(upload_limit):
+    requests_before = metric_value('s2s_requests_total{method="POST",path="/api/upload",status="413"}')
+    rejected_before = metric_value('s2s_uploads_total{outcome="rejected"}')
+
+    client.post("/api/upload", files={"file": ("big.csv", b"id\n" + b"1\n" * 2000)})
+
+    assert metric_value('s2s_requests_total{method="POST",path="/api/upload",status="413"}') == requests_before + 1
+    assert metric_value('s2s_uploads_total{outcome="rejected"}') == rejected_before + 1
+
+
+def test_file_over_the_upload_limit_is_rejected(monkeypatch):
+    monkeypatch.setattr(routes, "MAX_UPLOAD_BYTES", 10)
+    response = client.post("/api/upload", files={"file": ("t.csv", b"id,name\n1,a\n2,b\n")})
+    assert response.status_code == 413
+
+
+def test_upload_parsed_from_rolled_over_spool_file_which_is_then_closed(monkeypatch):
+    files = []
+
+    def capture(upload, max_bytes):
+        source, size = spooled_upload(upload, max_bytes)
+        files.append((source, spooled_file(source)[1]))
+        return source, size
+
+    monkeypatch.setattr(routes, "spooled_upload", capture)
+    rows = 120_000  # > 1 MiB, so Starlette has rolled the upload to a temp file
+    content = b"id,name\n" + b"".join(b"%d,name_%d\n" % (i, i) for i in range(rows))
+    result = upload("big.csv", content, with_row_count=True)
+
+    assert result["schema"]["row_count"] == rows
+    source, on_disk = files[0]
+    assert on_disk  # rolled over to disk, so the CSV was memory-mapped
+    assert source.closed
+
+
+# metrics
+def test_session_bytes_gauge_sums_recorded_sizes():
+    first = upload("a.csv", b"id,name\n1,a\n")
+    upload("b.csv", b"id,a_id\n1,1\n", session_id=first["session_id"])
+    memory = SESSIONS[first["session_id"]]["memory"]
+
+    assert metric_value("s2s_session_dataframe_bytes") == sum(m["bytes_after"] for m in memory.values())
+
+
+def test_request_metrics_are_labelled_by_route_template():
+    for sid in ("a", "ap"):
+        client.get(f"/api/session/{sid}/graph")
+    client.get("/core/")
+    client.get("/nope/a")
+
+    labels = [l for l in client.get("/core/metrics").text.splitlines() if l.startswith("s2s_requests_total{")]
+    paths = {l.split('path="', 1)[1].split('"', 1)[0] for l in labels}
+    assert "/api/session/{session_id}/graph" in paths
+    assert "/core/" in paths
+    assert "unmatched" in paths
+    assert not any("/session/a" in p or "}pi" in p or "}i" in p for p in paths)
@@ -0,0 +1,57 @@
+#tests/benchmarks/api_bench_test.py
+
+import pytest # type: ignore
+
+pytest.importorskip("pytest_benchmark")
+
+pytestmark = pytest.mark.benchmark
+
+from fastapi.testclient import TestClient # type: ignore
+
+from app.main import app
+from app.api.routes import SESSIONS
+from tests.benchmarks.generators import SEED, scaled, tall_csv, wide_csv, fk_session
+
+client = TestClient(app)
+
+
+def _upload(name: str, data: bytes, **params):
+    response = client.post("/api/upload", files={"file": (name, data)}, params=params)
+    assert response.status_code in (200, 201), response.text
+    return response.json()
+
+
+@pytest.mark.benchmark(group="api_upload")
+def test_upload_tall_csv(benchmark):
+    data = tall_csv(scaled(50_000), seed=SEED)
+    result = benchmark.pedantic(_upload, args=("orders.csv", data), rounds=5, iterations=1)
+    assert result["table_added"] == "orders"
+
+
+@pytest.mark.benchmark(group="api_upload")
+def test_upload_wide_csv(benchmark):
+    data = wide_csv(scaled(1_000), rows=200, seed=SEED)
+    result = benchmark.pedantic(_upload, args=("wide.csv", data), rounds=5, iterations=1)
+    assert len(result["schema"]["columns"]) == scaled(1_000)
+
+
+@pytest.mark.benchmark(group="api_upload")
+def test_upload_into_large_session_deep_check(benchmark):
+    """Upload a table with planted FKs into a session that already holds many tables."""
+    session = fk_session(scaled(100), rows=500, links_per_table=5, seed=SEED)
+    new_name = session["tables"][-1]["name"]
+    data = session["dfs"][new_name].to_csv(index=False).encode("utf-8")
+
+    def setup():
+        SESSIONS.clear()
+        SESSIONS["bench"] = {
+            "tables": [t for t in session["tables"] if t["name"] != new_name],
+            "links": [],
+            "suggested_links": [],
+            "dfs": {k: v for k, v in session["dfs"].items() if k != new_name},
+            "schema_name": "bench",
+        }
+        return (f"{new_name}.csv", data), {"session_id": "bench", "deep_check": True}
+
+    result = benchmark.pedantic(_upload, setup=setup, rounds=5)
+    assert result["suggested_links"]
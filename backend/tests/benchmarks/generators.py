@@ -0,0 +1,143 @@
+#tests/benchmarks/generators.py
+"""Seeded synthetic workbook generators for the benchmark suite.
+
+Every generator takes a `seed` so the same inputs are produced on every
+run, which keeps results comparable between commits.
+"""
+
+import os
+import json
+from io import BytesIO
+from typing import Dict, Any
+
+import numpy as np
+import pandas as pd
+
+from app.services.schema_infer import ensure_primary_key
+
+# Multiply generator sizes, e.g. S2S_BENCH_SCALE=10 for a heavier run
+SCALE = float(os.getenv("S2S_BENCH_SCALE", "1"))
+SEED = int(os.getenv("S2S_BENCH_SEED", "42"))
+
+STATUSES = ["active", "inactive", "pending", "archived", "deleted"]
+COUNTRIES = ["Zambia", "Kenya", "Ghana", "Nigeria", "Botswana", "Namibia", "Malawi", "Uganda"]
+
+
+def scaled(n: int) -> int:
+    return max(1, int(n * SCALE))
+
+
+def tall_frame(rows: int, seed: int = 0) -> pd.DataFrame:
+    """Narrow table with many rows: ids, numerics, low-cardinality strings and dates."""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "id": np.arange(1, rows + 1),
+        "customer_id": rng.integers(1, max(rows // 10, 2), rows),
+        "amount": rng.normal(100, 25, rows).round(2),
+        "quantity": rng.integers(1, 50, rows),
+        "status": rng.choice(STATUSES, rows),
+        "country": rng.choice(COUNTRIES, rows),
+        "created_at": pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 365 * 24 * 3600, rows), unit="s"),
+    })
+
+
+def wide_frame(columns: int, rows: int = 100, seed: int = 0) -> pd.DataFrame:
+    """Table with many columns cycling through int, float and string types."""
+    rng = np.random.default_rng(seed)
+    data = {"id": np.arange(1, rows + 1)}
+    for i in range(columns - 1):
+        kind = i % 3
+        if kind == 0:
+            data[f"metric_{i}"] = rng.integers(0, 1000, rows)
+        elif kind == 1:
+            data[f"ratio_{i}"] = rng.random(rows).round(4)
+        else:
+            data[f"label_{i}"] = rng.choice(STATUSES, rows)
+    return pd.DataFrame(data)
+
+
+def tall_csv(rows: int, seed: int = 0) -> bytes:
+    return tall_frame(rows, seed).to_csv(index=False).encode("utf-8")
+
+
+def wide_csv(columns: int, rows: int = 100, seed: int = 0) -> bytes:
+    return wide_frame(columns, rows, seed).to_csv(index=False).encode("utf-8")
+
+
+def multi_sheet_xlsx(sheets: int, rows: int, seed: int = 0) -> bytes:
+    """Workbook with several sheets of the tall layout (only the first is parsed by `get_schema`)."""
+    buffer = BytesIO()
+    with pd.ExcelWriter(buffer, engine="openpyxl") as writer:
+        for i in range(sheets):
+            tall_frame(rows, seed + i).to_excel(writer, sheet_name=f"sheet_{i + 1}", index=False)
+    return buffer.getvalue()
+
+
+def nested_json(records: int, seed: int = 0) -> bytes:
+    """Array of records with nested objects and lists, as produced by typical REST exports."""
+    rng = np.random.default_rng(seed)
+    payload = [
+        {
+            "id": i + 1,
+            "status": STATUSES[int(rng.integers(0, len(STATUSES)))],
+            "address": {
+                "country": COUNTRIES[int(rng.integers(0, len(COUNTRIES)))],
+                "postcode": int(rng.integers(10000, 99999)),
+            },
+            "tags": [STATUSES[int(t)] for t in rng.integers(0, len(STATUSES), 3)],
+            "score": round(float(rng.random()), 4),
+        }
+        for i in range(records)
+    ]
+    return json.dumps(payload).encode("utf-8")
+
+
+def fk_session(tables: int, rows: int = 200, links_per_table: int = 2, seed: int = 0) -> Dict[str, Any]:
+    """Build a session with many tables and planted foreign keys.
+
+    Table `t{i}` gets columns `t{j}_id` referencing `t{j}.id` for up to
+    `links_per_table` earlier tables, with values drawn from the referenced
+    table's ids so that overlap validation succeeds. The planted links are
+    returned under "planted_links" and also stored as confirmed links.
+    """
+    rng = np.random.default_rng(seed)
+    session = {
+        "tables": [],
+        "links": [],
+        "suggested_links": [],
+        "dfs": {},
+        "schema_name": "bench",
+    }
+    planted = []
+
+    for i in range(tables):
+        name = f"t{i}"
+        data = {
+            "id": np.arange(1, rows + 1),
+            "value": rng.random(rows).round(4),
+            "status": rng.choice(STATUSES, rows),
+        }
+        if i > 0:
+            parents = rng.choice(i, size=min(links_per_table, i), replace=False)
+            for j in sorted(int(p) for p in parents):
+                data[f"t{j}_id"] = rng.integers(1, rows + 1, rows)
+                planted.append({"from": f"{name}.t{j}_id", "to": f"t{j}.id"})
+        df = pd.DataFrame(data)
+
+        columns = [
+            {
+                "name": col,
+                "original_name": col,
+                "inferred_type": str(dtype),
+                "nullable": bool(df[col].isnull().any()),
+                "is_primary_key": col == "id",
+            }
+            for col, dtype in zip(df.columns, df.dtypes)
+        ]
+        columns, _ = ensure_primary_key(columns)
+        session["tables"].append({"name": name, "columns": columns})
+        session["dfs"][name] = df
+
+    session["links"] = [dict(link) for link in planted]
+    session["planted_links"] = planted
+    return session
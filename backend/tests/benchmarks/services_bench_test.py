@@ -0,0 +1,148 @@
+#tests/benchmarks/services_bench_test.py
+
+import pytest # type: ignore
+
+pytest.importorskip("pytest_benchmark")
+
+pytestmark = pytest.mark.benchmark
+
+from app.services.file_parser import get_schema
+from app.services.link_suggester import (
+    suggest_links_by_name,
+    boost_links_by_type,
+    validate_links_by_overlap,
+)
+from app.services.sql_generator import generate_sql
+from app.services.orm_generator import generate_orm
+from app.services.schema_graph import build_graph
+from tests.benchmarks.generators import (
+    SEED,
+    scaled,
+    tall_csv,
+    wide_csv,
+    multi_sheet_xlsx,
+    nested_json,
+    fk_session,
+)
+
+
+# get_schema
+@pytest.mark.benchmark(group="get_schema")
+def test_get_schema_tall_csv(benchmark):
+    data = tall_csv(scaled(100_000), seed=SEED)
+    result = benchmark(get_schema, data, "tall.csv", with_row_count=True)
+    assert result["row_count"] == scaled(100_000)
+
+
+@pytest.mark.benchmark(group="get_schema")
+def test_get_schema_wide_csv(benchmark):
+    data = wide_csv(scaled(1_000), rows=200, seed=SEED)
+    result = benchmark(get_schema, data, "wide.csv")
+    assert len(result["columns"]) == scaled(1_000)
+
+
+@pytest.mark.benchmark(group="get_schema")
+def test_get_schema_multi_sheet_xlsx(benchmark):
+    data = multi_sheet_xlsx(3, scaled(2_000), seed=SEED)
+    result = benchmark.pedantic(get_schema, args=(data, "workbook.xlsx"), rounds=3, iterations=1)
+    assert result["columns"]
+
+
+@pytest.mark.benchmark(group="get_schema")
+def test_get_schema_nested_json(benchmark):
+    data = nested_json(scaled(20_000), seed=SEED)
+    result = benchmark(get_schema, data, "nested.json", with_row_count=True)
+    assert result["row_count"] == scaled(20_000)
+
+
+# link suggester
+@pytest.fixture(scope="module")
+def many_tables():
+    return fk_session(scaled(200), rows=500, links_per_table=5, seed=SEED)
+
+
+@pytest.mark.benchmark(group="link_suggester")
+def test_suggest_links_by_name(benchmark, many_tables):
+    new_table = many_tables["tables"][-1]
+    existing = many_tables["tables"][:-1]
+    suggestions = benchmark(suggest_links_by_name, new_table, existing)
+    planted = {(l["from"], l["to"]) for l in many_tables["planted_links"] if l["from"].startswith(new_table["name"] + ".")}
+    assert planted <= {(s["from"], s["to"]) for s in suggestions}
+
+
+@pytest.mark.benchmark(group="link_suggester")
+def test_boost_links_by_type(benchmark, many_tables):
+    new_table = many_tables["tables"][-1]
+    suggestions = suggest_links_by_name(new_table, many_tables["tables"][:-1])
+
+    def setup():
+        return ([dict(s) for s in suggestions], many_tables["tables"]), {}
+
+    boosted = benchmark.pedantic(boost_links_by_type, setup=setup, rounds=50)
+    assert len(boosted) == len(suggestions)
+
+
+@pytest.mark.benchmark(group="link_suggester")
+def test_validate_links_by_overlap(benchmark, many_tables):
+    new_table = many_tables["tables"][-1]
+    suggestions = suggest_links_by_name(new_table, many_tables["tables"][:-1])
+
+    def setup():
+        return (new_table, many_tables["dfs"], [dict(s) for s in suggestions]), {}
+
+    validated = benchmark.pedantic(validate_links_by_overlap, setup=setup, rounds=20)
+    assert len(validated) == len(suggestions)
+
+
+# generators
+@pytest.mark.benchmark(group="generators")
+def test_generate_sql(benchmark, many_tables):
+    stmts = benchmark(generate_sql, many_tables)
+    assert sum(1 for s in stmts if s.startswith("CREATE TABLE")) == len(many_tables["tables"])
+
+
+@pytest.mark.benchmark(group="generators")
+def test_generate_orm(benchmark, many_tables):
+    lines = benchmark(generate_orm, many_tables)
+    assert sum(1 for l in lines if l.startswith("class ")) == len(many_tables["tables"])
+
+
+# schema graph
+@pytest.fixture(scope="module")
+def cyclic_tables():
+    """Many tables with planted FKs plus back-references that close cycles."""
+    session = fk_session(scaled(2_000), rows=10, links_per_table=3, seed=SEED)
+    names = [t["name"] for t in session["tables"]]
+    for i in range(0, len(names) - 1, 10):
+        session["links"].append({"from": f"{names[i]}.{names[i + 1]}_id", "to": f"{names[i + 1]}.id"})
+    return session
+
+
+@pytest.mark.benchmark(group="schema_graph")
+def test_graph_creation_order(benchmark, cyclic_tables):
+    def run():
+        return build_graph(cyclic_tables).creation_order()
+
+    order, deferred = benchmark(run)
+    assert len(order) == len(cyclic_tables["tables"])
+    assert deferred
+
+
+@pytest.mark.benchmark(group="schema_graph")
+def test_graph_join_paths(benchmark, cyclic_tables):
+    graph = build_graph(cyclic_tables)
+    names = list(graph.tables)
+
+    def run():
+        graph._changed()
+        return [graph.join_path(names[-1], target) for target in names[::50]]
+
+    paths = benchmark(run)
+    assert all(p is not None for p in paths)
+
+
+@pytest.mark.benchmark(group="generators")
+def test_generate_sql_with_cycles(benchmark, cyclic_tables):
+    cyclic_tables.pop("graph", None)
+    stmts = benchmark(generate_sql, cyclic_tables)
+    assert any(s.startswith("ALTER TABLE") for s in stmts)
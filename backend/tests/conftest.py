@@ -0,0 +1,12 @@
+#tests/conftest.py
+
+import pytest # type: ignore
+
+from app.api.routes import SESSIONS
+
+
+@pytest.fixture(autouse=True)
+def clear_sessions():
+    SESSIONS.clear()
+    yield
+    SESSIONS.clear()
@@ -0,0 +1,96 @@
+#tests/metrics_test.py
+
+import pytest # type: ignore
+from fastapi.testclient import TestClient # type: ignore
+
+import app.main as main
+from app.core.metrics import (
+    Counter,
+    Histogram,
+    Registry,
+    STAGE_SECONDS,
+    span,
+    timed,
+    start_request_spans,
+    server_timing_header,
+)
+
+client = TestClient(main.app)
+
+
+def stage_count(stage: str) -> int:
+    series = STAGE_SECONDS._series.get((("stage", stage),))
+    return series["count"] if series else 0
+
+
+# histograms and counters
+def test_histogram_buckets_are_cumulative():
+    hist = Histogram("h", "doc", buckets=(1, 5))
+    for value in (0.5, 3, 10):
+        hist.observe(value, {"stage": "x"})
+
+    assert hist.render() == [
+        'h_bucket{stage="x",le="1"} 1',
+        'h_bucket{stage="x",le="5"} 2',
+        'h_bucket{stage="x",le="+Inf"} 3',
+        'h_sum{stage="x"} 13.5',
+        'h_count{stage="x"} 3',
+    ]
+
+
+def test_registry_renders_help_type_and_escaped_labels():
+    registry = Registry()
+    counter = registry.register(Counter("c_total", "Things"))
+    counter.inc(labels={"path": 'a"b'})
+    counter.inc(2, labels={"path": 'a"b'})
+
+    assert registry.render() == '# HELP c_total Things\n# TYPE c_total counter\nc_total{path="a\\"b"} 3\n'
+
+
+# spans
+def test_span_and_timed_record_stage_and_request_spans():
+    @timed("test_decorated")
+    def work():
+        with span("test_inner"):
+            return 42
+
+    before = stage_count("test_decorated"), stage_count("test_inner")
+    spans = start_request_spans()
+
+    assert work() == 42
+    assert [name for name, _ in spans] == ["test_inner", "test_decorated"]
+    assert (stage_count("test_decorated"), stage_count("test_inner")) == (before[0] + 1, before[1] + 1)
+
+
+def test_span_is_recorded_even_when_the_block_raises():
+    before = stage_count("test_failing")
+    with pytest.raises(ValueError):
+        with span("test_failing"):
+            raise ValueError("boom")
+    assert stage_count("test_failing") == before + 1
+
+
+def test_server_timing_header_format():
+    assert server_timing_header([("parse", 0.0125)], 0.02) == "parse;dur=12.50, total;dur=20.00"
+
+
+# Server-Timing header
+def test_server_timing_header_sent_and_exposed_to_the_frontend(monkeypatch):
+    monkeypatch.setattr(main, "SERVER_TIMING", True)
+    response = client.post(
+        "/api/upload",
+        files={"file": ("users.csv", b"id,name\n1,a\n")},
+        headers={"origin": "http://localhost:3000"},
+    )
+
+    stages = [entry.split(";", 1)[0] for entry in response.headers["server-timing"].split(", ")]
+    assert "get_schema" in stages
+    assert stages[-1] == "total"
+    assert "server-timing" in response.headers["access-control-expose-headers"].lower()
+    assert response.headers["timing-allow-origin"] == "http://localhost:3000"
+
+
+def test_server_timing_header_off_by_default():
+    response = client.get("/core/", headers={"origin": "http://localhost:3000"})
+    assert "server-timing" not in response.headers
+    assert "timing-allow-origin" not in response.headers
@@ -0,0 +1,297 @@
+#tests/services_test.py
+
+import tempfile
+import numpy as np
+import pandas as pd
+
+from app.services.table_diff import profile_columns, diff_columns, merge_columns, split_links
+from app.services.link_suggester import suggest_links_for_columns
+from app.services.artifact_cache import cached_artifacts, invalidate
+from app.services.sql_generator import generate_sql
+from app.services.orm_generator import generate_orm
+from app.services.schema_graph import SchemaGraph, build_graph
+from app.services.frame_compactor import compact_frame, frame_bytes, link_columns
+from app.services.upload_spool import spooled_file
+
+
+def column(name: str, pk: bool = False, dtype: str = "int64") -> dict:
+    return {"name": name, "original_name": name, "inferred_type": dtype, "nullable": False, "is_primary_key": pk}
+
+
+def table(name: str, *columns: dict) -> dict:
+    return {"name": name, "columns": list(columns)}
+
+
+# table_diff
+def test_diff_columns_groups_added_removed_changed_unchanged():
+    old = profile_columns(pd.DataFrame({"id": [1, 2], "amount": [5, 6], "users_id": [1, 1]}))
+    new = profile_columns(pd.DataFrame({"id": [1, 2], "amount": [5, 7], "products_id": [3, 3]}))
+
+    assert diff_columns(old, new) == {
+        "added": ["products_id"],
+        "removed": ["users_id"],
+        "changed": ["amount"],
+        "unchanged": ["id"],
+    }
+
+
+def test_diff_columns_detects_type_change_with_equal_values():
+    old = profile_columns(pd.DataFrame({"x": [1, 2]}))
+    new = profile_columns(pd.DataFrame({"x": [1.0, 2.0]}))
+
+    assert diff_columns(old, new)["changed"] == ["x"]
+
+
+def test_diff_columns_against_missing_profiles_marks_everything_added():
+    new = profile_columns(pd.DataFrame({"id": [1], "name": ["a"]}))
+
+    assert diff_columns({}, new)["added"] == ["id", "name"]
+
+
+def test_merge_columns_keeps_stored_entries_only_for_unchanged():
+    stored_id = {**column("id", pk=True), "note": "edited"}
+    merged = merge_columns(
+        [stored_id, column("amount")],
+        [column("id", pk=True), column("amount", dtype="float64")],
+        unchanged=["id"],
+    )
+
+    assert merged[0]["note"] == "edited"
+    assert merged[1]["inferred_type"] == "float64"
+
+
+def test_split_links_matches_either_end():
+    links = [
+        {"from": "orders.users_id", "to": "users.id"},
+        {"from": "items.orders_id", "to": "orders.id"},
+        {"from": "items.products_id", "to": "products.id"},
+    ]
+    touching, rest = split_links(links, "orders", ["users_id", "id"])
+
+    assert touching == links[:2]
+    assert rest == links[2:]
+
+
+# link_suggester
+def test_suggest_links_for_columns_only_touches_given_columns():
+    users = table("users", column("id", pk=True))
+    products = table("products", column("id", pk=True))
+    orders = table("orders", column("id", pk=True), column("users_id"), column("products_id"))
+    items = table("items", column("id", pk=True), column("orders_id"))
+    tables = [users, products, orders, items]
+
+    outgoing = suggest_links_for_columns(orders, ["products_id"], tables)
+    assert [(s["from"], s["to"]) for s in outgoing] == [("orders.products_id", "products.id")]
+
+    incoming = suggest_links_for_columns(orders, ["id"], tables)
+    assert [(s["from"], s["to"]) for s in incoming] == [("items.orders_id", "orders.id")]
+
+
+# artifact_cache
+def session_with_links() -> dict:
+    return {
+        "tables": [
+            table("users", column("id", pk=True)),
+            table("orders", column("id", pk=True), column("users_id")),
+            table("items", column("id", pk=True), column("orders_id")),
+        ],
+        "links": [
+            {"from": "orders.users_id", "to": "users.id"},
+            {"from": "items.orders_id", "to": "orders.id"},
+        ],
+    }
+
+
+def test_cached_artifacts_match_generators():
+    session = session_with_links()
+
+    assert cached_artifacts(session, "sql") == generate_sql(session)
+    assert cached_artifacts(session, "sql") == generate_sql(session)
+    assert cached_artifacts(session, "orm") == generate_orm(session)
+
+
+def test_cached_artifacts_reuse_blocks_through_the_generator():
+    session = session_with_links()
+    cached_artifacts(session, "orm")
+    built = []
+    block = lambda table, links, build: built.append(table["name"]) or build(table, links)
+
+    generate_orm(session, block=block)
+    assert built == ["users", "orders", "items"]
+
+    before = dict(session["artifacts"]["orm"])
+    cached_artifacts(session, "orm")
+    assert all(session["artifacts"]["orm"][k] is v for k, v in before.items())
+
+
+def test_invalidate_rebuilds_only_named_tables():
+    session = session_with_links()
+    cached_artifacts(session, "sql")
+    before = dict(session["artifacts"]["sql"])
+
+    session["tables"][1]["columns"].append(column("note", dtype="object"))
+    invalidate(session, ["orders"])
+    lines = cached_artifacts(session, "sql")
+    after = session["artifacts"]["sql"]
+
+    assert after["0:users"] is before["0:users"]
+    assert after["2:items"] is before["2:items"]
+    assert after["1:orders"] is not before["1:orders"]
+    assert "  note TEXT NOT NULL," in lines
+
+
+# schema_graph
+def graph_of(tables: list, links: list) -> SchemaGraph:
+    graph = SchemaGraph()
+    for name in tables:
+        graph.add_table(name)
+    for src, dst in links:
+        graph.add_link({"from": f"{src}.{dst}_id", "to": f"{dst}.id"})
+    return graph
+
+
+def test_components_and_cycles_with_self_reference_and_three_table_cycle():
+    graph = graph_of(
+        ["a", "b", "c", "emp", "solo"],
+        [("a", "b"), ("b", "c"), ("c", "a"), ("emp", "emp")],
+    )
+
+    assert sorted(graph.components()) == [["a", "b", "c"], ["emp"], ["solo"]]
+    assert sorted(graph.cycles()) == [["a", "b", "c"], ["emp"]]
+
+
+def test_creation_order_puts_referenced_tables_first():
+    graph = graph_of(["orders", "items", "users"], [("orders", "users"), ("items", "orders")])
+
+    order, deferred = graph.creation_order()
+    assert order == ["users", "orders", "items"]
+    assert deferred == []
+
+
+def test_creation_order_defers_only_the_link_closing_a_cycle():
+    graph = graph_of(["a", "b", "c", "emp"], [("a", "b"), ("b", "c"), ("c", "a"), ("emp", "emp")])
+
+    order, deferred = graph.creation_order()
+    assert order == ["c", "b", "a", "emp"]
+    # emp references itself inline; only c -> a closes the cycle
+    assert [(l["from"], l["to"]) for l in deferred] == [("c.a_id", "a.id")]
+
+
+def test_creation_order_single_back_link_cycle():
+    graph = graph_of(["users", "orders"], [("orders", "users"), ("users", "orders")])
+
+    order, deferred = graph.creation_order()
+    assert order == ["orders", "users"]
+    assert [(l["from"], l["to"]) for l in deferred] == [("orders.users_id", "users.id")]
+
+
+def test_join_path_same_unreachable_and_reverse():
+    graph = graph_of(["users", "orders", "items", "island"], [("orders", "users"), ("items", "orders")])
+
+    assert graph.join_path("users", "users") == []
+    assert graph.join_path("users", "island") is None
+    assert graph.join_path("users", "missing") is None
+    path = graph.join_path("users", "items")
+    assert [(l["from"], l["to"]) for l in path] == [("orders.users_id", "users.id"), ("items.orders_id", "orders.id")]
+
+
+def test_join_path_cache_is_dropped_when_links_change():
+    graph = graph_of(["a", "b"], [])
+    assert graph.join_path("a", "b") is None
+
+    graph.add_link({"from": "a.b_id", "to": "b.id"})
+    assert len(graph.join_path("a", "b")) == 1
+
+
+def test_generate_sql_and_cached_artifacts_agree_on_deferred_constraints():
+    session = {
+        "tables": [
+            table("users", column("id", pk=True), column("orders_id")),
+            table("orders", column("id", pk=True), column("users_id")),
+        ],
+        "links": [
+            {"from": "orders.users_id", "to": "users.id"},
+            {"from": "users.orders_id", "to": "orders.id"},
+        ],
+    }
+    sql = generate_sql(session)
+
+    assert sql == cached_artifacts(session, "sql")
+    # users was uploaded first, so orders is created first and its FK to users is deferred
+    assert sql.index("CREATE TABLE orders (") < sql.index("CREATE TABLE users (")
+    assert "  FOREIGN KEY (orders_id) REFERENCES orders(id)" in sql
+    assert sql[-3:] == [
+        "ALTER TABLE orders ADD CONSTRAINT fk_orders_users_id",
+        "  FOREIGN KEY (users_id) REFERENCES users(id);",
+        "",
+    ]
+
+
+def test_build_graph_matches_incremental_graph():
+    session = session_with_links()
+    incremental = graph_of(["users", "orders", "items"], [("orders", "users"), ("items", "orders")])
+
+    assert build_graph(session).to_dict() == incremental.to_dict()
+
+
+# upload_spool
+def test_spooled_file_reports_whether_the_upload_is_on_disk():
+    spooled = tempfile.SpooledTemporaryFile(max_size=10)
+    spooled.write(b"id\n1\n")
+    assert spooled_file(spooled) == (spooled._file, False)
+    assert not spooled._rolled  # probing did not force a rollover
+
+    spooled.write(b"2\n" * 10)
+    inner, on_disk = spooled_file(spooled)
+    assert on_disk and inner is spooled._file
+
+
+def test_spooled_file_falls_back_to_the_wrapper_without_internals(monkeypatch):
+    spooled = tempfile.SpooledTemporaryFile(max_size=10)
+    monkeypatch.delattr(spooled, "_file")
+    assert spooled_file(spooled) == (spooled, False)
+
+
+# frame_compactor
+def test_compact_frame_downcasts_signed_and_unsigned_integers():
+    df = pd.DataFrame({"small": [1, 2, 200], "signed": [-1, 0, 100], "wide": [0, 1, 70_000]})
+    compacted, _ = compact_frame(df, [])
+
+    assert compacted.dtypes.to_dict() == {"small": np.uint8, "signed": np.int8, "wide": np.uint32}
+    assert compacted.astype("int64").equals(df)
+
+
+def test_compact_frame_keeps_float32_only_when_lossless():
+    df = pd.DataFrame({"halves": [0.5, 1.25, np.nan], "precise": [0.1, 1 / 3, 2.0]})
+    compacted, _ = compact_frame(df, [])
+
+    assert compacted["halves"].dtype == np.float32
+    assert compacted["precise"].dtype == np.float64
+
+
+def test_compact_frame_makes_repetitive_strings_categorical():
+    df = pd.DataFrame({"status": ["open", "closed"] * 50, "note": [f"note {i}" for i in range(100)]})
+    compacted, _ = compact_frame(df, [])
+
+    assert isinstance(compacted["status"].dtype, pd.CategoricalDtype)
+    assert not isinstance(compacted["note"].dtype, pd.CategoricalDtype)
+    assert compacted["status"].astype(str).tolist() == df["status"].tolist()
+
+
+def test_compact_frame_links_only_keeps_key_and_id_columns():
+    df = pd.DataFrame({"code": ["a", "b"], "users_id": [1, 2], "id": [3, 4], "amount": [5.5, 6.5]})
+    schema = [column("code", pk=True), column("users_id"), column("id"), column("amount", dtype="float64")]
+    compacted, report = compact_frame(df, schema, links_only=True)
+
+    assert link_columns(schema) == ["code", "users_id", "id"]
+    assert list(compacted.columns) == ["code", "users_id", "id"]
+    assert report["dropped_columns"] == ["amount"]
+
+
+def test_compact_frame_reports_bytes_before_and_after():
+    df = pd.DataFrame({"id": range(1000), "status": ["open", "closed"] * 500})
+    compacted, report = compact_frame(df, [])
+
+    assert report["bytes_before"] == frame_bytes(df)
+    assert report["bytes_after"] == frame_bytes(compacted)
+    assert report["bytes_after"] < report["bytes_before"]